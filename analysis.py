@@ -0,0 +1,181 @@
+"""Пакетный анализ сохранённых партий в пуле процессов.
+
+Партии из файлов Game.save_game и архивов (см. archive) проигрываются в главном процессе, а каждая
+получившаяся позиция (ходы, угрозы, оценка) анализируется в рабочих
+процессах concurrent.futures.ProcessPoolExecutor. Позиции отправляются
+пачками, чтобы расходы на передачу между процессами не превышали саму
+работу, а результаты выдаются по мере готовности. Партия с недопустимым
+ходом не прерывает анализ: её позиции до этого хода анализируются, а сама
+ошибка выдаётся отдельной записью GameError.
+"""
+
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import checkers
+from archive import iter_games, replay
+from bitboard import bit_squares, generate_legal_moves
+from chesss import Board
+from core import BLACK, LETTERS, SQUARE_NAMES
+from engine import move_names
+
+PositionReport = namedtuple('PositionReport', 'filename game ply turn moves threats score')
+GameError = namedtuple('GameError', 'filename game error')
+
+# Число позиций в одной задаче пула.
+CHUNK_SIZE = 64
+# Сколько задач на процесс держать в очереди пула: партии читаются по мере
+# освобождения процессов, а не все сразу.
+IN_FLIGHT = 4
+
+
+def game_positions(game):
+    """Проигрывает партию и перечисляет её позиции.
+
+    Args:
+        game (archive.ArchiveGame): Партия из архива или файла save.
+
+    Yields:
+        tuple: (номер полухода, коды 64 клеток, сторона, чей ход, клетка
+        шашки, продолжающей серию взятий, или None).
+    """
+    board = Board(game_type=game.variant)
+    yield 0, bytes(board.squares), board.turn, None
+    for ply, board in enumerate(replay(game), 1):
+        start = checkers.continuation_square(board) if game.variant == 'checkers' else None
+        yield ply, bytes(board.squares), board.turn, start
+
+
+def analyze_position(board, start=None):
+    """Анализирует одну позицию.
+
+    Args:
+        board (Board): Доска с позицией.
+        start (int): Для шашек — клетка (из 32), с которой продолжается серия взятий.
+
+    Returns:
+        tuple: Допустимые ходы стороны, чей ход, в нотации (в шахматах — без
+        шаха своему королю); угрозы — пары (клетка своей фигуры, клетки
+        атакующих её фигур); оценка с точки зрения белых.
+    """
+    turn = board.turn
+    if board.game_type == 'checkers':
+        position = checkers.position_from_board(board)
+        moves = ['-'.join(checkers.path_names(path)) for path, _ in checkers.generate_moves(position, turn, start)]
+    else:
+        moves = [''.join(move_names(move)) for move in generate_legal_moves(board.squares, turn)]
+
+    own = BLACK if turn == 'black' else 0
+    enemy_map = board.attack_map('white' if own else 'black')
+    threats = []
+    for sq, code in enumerate(board.squares):
+        if code and (code & BLACK) == own and enemy_map[sq]:
+            threats.append((f"{LETTERS[code]}{SQUARE_NAMES[sq]}",
+                            [f"{LETTERS[board.squares[a]]}{SQUARE_NAMES[a]}" for a in bit_squares(enemy_map[sq])]))
+    return moves, threats, board.score
+
+
+def _analyze_chunk(filename, game, variant, positions):
+    """Задача пула: анализирует пачку позиций одной партии.
+
+    Args:
+        filename (str): Имя файла (для отчёта).
+        game (int): Номер партии в файле (для отчёта).
+        variant (str): 'chess' или 'checkers'.
+        positions (list): Кортежи из game_positions.
+
+    Returns:
+        list: Отчёты PositionReport.
+    """
+    board = Board(game_type=variant)
+    reports = []
+    for ply, squares, turn, start in positions:
+        board.set_position(squares, turn)
+        moves, threats, score = analyze_position(board, start)
+        reports.append(PositionReport(filename, game, ply, turn, moves, threats, score))
+    return reports
+
+
+def _chunks(filenames, variant, chunk_size):
+    """Разбивает позиции всех партий всех файлов на пачки.
+
+    Yields:
+        tuple: (имя файла, партия, пачка позиций, ошибка). Ошибка — текст
+        ValueError из archive.replay для последней пачки партии с
+        недопустимым ходом, иначе None.
+    """
+    for filename in filenames:
+        for game in iter_games(filename, variant):
+            chunk = []
+            error = None
+            try:
+                for position in game_positions(game):
+                    chunk.append(position)
+                    if len(chunk) == chunk_size:
+                        yield filename, game, chunk, None
+                        chunk = []
+            except ValueError as exc:
+                error = str(exc)
+            if chunk or error is not None:
+                yield filename, game, chunk, error
+
+
+def analyze_games(filenames, jobs=None, variant='chess', chunk_size=CHUNK_SIZE):
+    """Анализирует все позиции партий и выдаёт отчёты по мере готовности.
+
+    Args:
+        filenames (list): Файлы партий в формате Game.save_game или архивы
+            из нескольких партий (см. archive).
+        jobs (int): Число рабочих процессов (по умолчанию — по числу ядер);
+            при jobs == 1 анализ идёт в текущем процессе по порядку.
+        variant (str): Вариант для партий без разделителя ('chess' или 'checkers').
+        chunk_size (int): Число позиций в одной задаче пула.
+
+    Yields:
+        PositionReport: Отчёт по позиции или GameError для партии с
+        недопустимым ходом. При нескольких процессах порядок отчётов не
+        определён.
+    """
+    if jobs == 1:
+        for filename, game, chunk, error in _chunks(filenames, variant, chunk_size):
+            yield from _analyze_chunk(filename, game.index, game.variant, chunk)
+            if error is not None:
+                yield GameError(filename, game.index, error)
+        return
+
+    jobs = jobs or os.cpu_count() or 1
+    chunks = _chunks(filenames, variant, chunk_size)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = set()
+        for filename, game, chunk, error in chunks:
+            if error is not None:
+                yield GameError(filename, game.index, error)
+            if chunk:
+                pending.add(pool.submit(_analyze_chunk, filename, game.index, game.variant, chunk))
+            if len(pending) >= IN_FLIGHT * jobs:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in as_completed(pending):
+            yield from future.result()
+
+
+def run(args):
+    """Выполняет команду analyze из командной строки.
+
+    Отчёты печатаются построчно в формате JSON по мере готовности, ошибки
+    партий — такими же строками с полем error.
+
+    Args:
+        args (argparse.Namespace): Аргументы files, jobs и variant.
+
+    Returns:
+        int: Код завершения (1, если в какой-то партии был недопустимый ход).
+    """
+    failed = 0
+    for report in analyze_games(args.files, args.jobs, args.variant):
+        print(json.dumps(report._asdict(), ensure_ascii=False), flush=True)
+        failed += isinstance(report, GameError)
+    return 1 if failed else 0
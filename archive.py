@@ -0,0 +1,239 @@
+"""Архивы из многих партий в текстовом формате сохранения.
+
+Партии идут подряд, каждая начинается строкой-разделителем ``# <вариант>``
+(``# chess`` или ``# checkers``), за которой следуют ходы в формате
+Game.save_game — по ходу ``{фигура}{откуда}{куда}`` на строку. Файл без
+разделителей читается как одна партия, поэтому обычные файлы save тоже
+являются архивами.
+
+Архив читается потоково: в памяти держится только текущая партия. Для
+перехода к партии N рядом с архивом строится индекс ``<архив>.idx`` со
+смещениями начала партий.
+"""
+
+import os
+from array import array
+from collections import namedtuple
+
+DELIMITER = '#'
+VARIANTS = ('chess', 'checkers')
+
+ArchiveGame = namedtuple('ArchiveGame', 'index variant moves')
+
+
+def _parse_delimiter(line, default):
+    """Возвращает вариант из строки-разделителя."""
+    variant = line[len(DELIMITER):].strip() or default
+    if variant not in VARIANTS:
+        raise ValueError(f"Неизвестный вариант игры: {variant!r}")
+    return variant
+
+
+def _parse_move(line):
+    """Разбирает строку хода вида 'Pe2e4' в пару клеток."""
+    return line[1:3], line[3:5]
+
+
+def iter_games(path, variant='chess'):
+    """Перечисляет партии архива по одной.
+
+    Args:
+        path (str): Файл архива.
+        variant (str): Вариант для партий без разделителя в начале файла.
+
+    Yields:
+        ArchiveGame: Номер партии, вариант и ходы — пары (start, end).
+    """
+    with open(path, 'rb') as f:
+        yield from _read_games(f, variant, 0)
+
+
+def _read_games(f, variant, index, limit=None):
+    """Читает партии из открытого файла начиная с текущей позиции."""
+    moves = None
+    for raw in f:
+        line = raw.decode('ascii').strip()
+        if not line:
+            continue
+        if line.startswith(DELIMITER):
+            if moves is not None:
+                yield ArchiveGame(index, variant, moves)
+                index += 1
+                if limit is not None and index >= limit:
+                    return
+            variant = _parse_delimiter(line, variant)
+            moves = []
+        else:
+            if moves is None:
+                moves = []
+            moves.append(_parse_move(line))
+    if moves is not None:
+        yield ArchiveGame(index, variant, moves)
+
+
+def replay(game):
+    """Проигрывает партию, проверяя каждый ход.
+
+    Args:
+        game (ArchiveGame): Партия из архива.
+
+    Yields:
+        Board: Доска после каждого хода (один и тот же объект).
+
+    Raises:
+        ValueError: Если ход недопустим.
+    """
+    from chesss import GameSession
+
+    session = GameSession(game.variant, cache_size=0)
+    for ply, (start, end) in enumerate(game.moves):
+        if not session.make_move(start, end).legal:
+            raise ValueError(f"Партия {game.index}, полуход {ply + 1}: недопустимый ход {start}{end}")
+        yield session.board
+
+
+def write_game(f, variant, moves, delimiter=True):
+    """Дописывает партию в открытый текстовый файл архива.
+
+    Args:
+        f: Файл, открытый на запись.
+        variant (str): 'chess' или 'checkers'.
+        moves (iterable): Записи (start, end, piece, captured), например
+            board.move_history.notation.
+        delimiter (bool): Писать ли строку-разделитель; без неё партия
+            записывается как обычный файл save.
+    """
+    if delimiter:
+        f.write(f"{DELIMITER} {variant}\n")
+    for start, end, piece, captured in moves:
+        f.write(f"{piece}{start}{end}\n")
+
+
+def starts_with_delimiter(path):
+    """Проверяет, начинается ли архив со строки-разделителя.
+
+    Если нет, первая партия записана без разделителя, как в файле save.
+
+    Args:
+        path (str): Файл архива.
+
+    Returns:
+        bool: True и для пустого файла.
+    """
+    with open(path, 'rb') as f:
+        for raw in f:
+            stripped = raw.strip()
+            if stripped:
+                return stripped.startswith(DELIMITER.encode())
+    return True
+
+
+def index_path(path):
+    """Имя файла индекса для архива."""
+    return path + '.idx'
+
+
+def build_index(path):
+    """Строит индекс смещений партий и сохраняет его рядом с архивом.
+
+    Индекс — array('Q'): размер архива, время его изменения (st_mtime_ns),
+    затем смещение начала каждой партии. Если файл индекса записать нельзя
+    (например, каталог только для чтения), индекс просто возвращается.
+
+    Args:
+        path (str): Файл архива.
+
+    Returns:
+        array: Смещения партий.
+    """
+    stat = os.stat(path)
+    offsets = array('Q')
+    delimiter = DELIMITER.encode()
+    first = True
+    position = 0
+    with open(path, 'rb') as f:
+        for raw in f:
+            stripped = raw.strip()
+            if stripped:
+                if first or stripped.startswith(delimiter):
+                    offsets.append(position)
+                first = False
+            position += len(raw)
+    index = array('Q', [stat.st_size, stat.st_mtime_ns])
+    index.extend(offsets)
+    try:
+        with open(index_path(path), 'wb') as f:
+            index.tofile(f)
+    except OSError:
+        pass
+    return offsets
+
+
+def load_index(path):
+    """Загружает индекс архива, перестраивая его, если архив изменился.
+
+    Индекс считается устаревшим, если размер или время изменения архива
+    не совпадают с записанными, а также если файл индекса повреждён.
+
+    Args:
+        path (str): Файл архива.
+
+    Returns:
+        array: Смещения партий.
+    """
+    stat = os.stat(path)
+    try:
+        index = array('Q')
+        with open(index_path(path), 'rb') as f:
+            index.frombytes(f.read())
+        if len(index) >= 2 and index[0] == stat.st_size and index[1] == stat.st_mtime_ns:
+            return index[2:]
+    except (OSError, ValueError):
+        pass
+    return build_index(path)
+
+
+def count_games(path):
+    """Возвращает число партий в архиве (по индексу)."""
+    return len(load_index(path))
+
+
+def read_game(path, n, variant='chess'):
+    """Читает партию номер n, не читая предыдущие.
+
+    Args:
+        path (str): Файл архива.
+        n (int): Номер партии с нуля.
+        variant (str): Вариант для партии без разделителя.
+
+    Returns:
+        ArchiveGame: Партия.
+
+    Raises:
+        IndexError: Если партии с таким номером нет.
+    """
+    offsets = load_index(path)
+    if not 0 <= n < len(offsets):
+        raise IndexError(f"В архиве {len(offsets)} партий, номер {n} вне диапазона")
+    with open(path, 'rb') as f:
+        f.seek(offsets[n])
+        return next(_read_games(f, variant, n, limit=n + 1))
+
+
+def iter_games_from(path, n, variant='chess'):
+    """Перечисляет партии начиная с номера n.
+
+    Args:
+        path (str): Файл архива.
+        n (int): Номер первой партии.
+        variant (str): Вариант для партии без разделителя.
+
+    Yields:
+        ArchiveGame: Партии с номерами n, n + 1, ...
+    """
+    offsets = load_index(path)
+    if n >= len(offsets):
+        return
+    with open(path, 'rb') as f:
+        f.seek(offsets[n])
+        yield from _read_games(f, variant, n)
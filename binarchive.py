@@ -0,0 +1,286 @@
+"""Двоичный формат архива партий с произвольным доступом через mmap.
+
+Раскладка файла (все числа little-endian)::
+
+    заголовок файла   MAGIC (4 байта), версия (u16), резерв (u16),
+                      число партий (u32), смещение индекса (u64)
+    партии подряд     вариант (u8), флаги (u8), 2 байта резерва,
+                      число ходов (u32), затем по 2 байта на ход:
+                      core.pack_move(откуда, куда)
+    индекс            смещение начала каждой партии (u64)
+
+Символ фигуры в двоичном формате не хранится: он однозначно восстанавливается
+при проигрывании партии. Флаг PLAIN отмечает партию, у которой в текстовом
+архиве не было строки-разделителя (обычный файл save), поэтому текстовый
+формат и двоичный переводятся друг в друга без потерь. Ходы проверяются
+проигрыванием при записи, так что в двоичный архив попадают только
+допустимые партии.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from archive import ArchiveGame, iter_games, replay, starts_with_delimiter, write_game
+from core import SQUARE_NAMES, pack_move, square, unpack_move
+
+MAGIC = b'MCHB'
+VERSION = 1
+VARIANTS = ('chess', 'checkers')
+PLAIN = 1
+
+_FILE_HEADER = struct.Struct('<4sHHIQ')
+_GAME_HEADER = struct.Struct('<BB2xI')
+_OFFSET = struct.Struct('<Q')
+
+
+def _little_endian(moves):
+    """Переводит массив array('H') в порядок байт little-endian (на месте)."""
+    if sys.byteorder == 'big':
+        moves.byteswap()
+    return moves
+
+
+class BinaryArchiveWriter:
+    """Записывает партии в двоичный архив; используется как контекстный менеджер."""
+
+    def __init__(self, path):
+        """Открывает файл и резервирует место под заголовок.
+
+        Args:
+            path (str): Имя файла архива.
+        """
+        self._file = open(path, 'wb')
+        self._file.write(bytes(_FILE_HEADER.size))
+        self._offsets = array('Q')
+
+    def add_game(self, variant, moves, plain=False):
+        """Дописывает партию.
+
+        Args:
+            variant (str): 'chess' или 'checkers'.
+            moves (iterable): Пары (start, end) в нотации.
+            plain (bool): Партия записана в тексте без строки-разделителя.
+        """
+        packed = _little_endian(array('H', (pack_move(square(start), square(end)) for start, end in moves)))
+        self._offsets.append(self._file.tell())
+        self._file.write(_GAME_HEADER.pack(VARIANTS.index(variant), PLAIN if plain else 0, len(packed)))
+        self._file.write(packed.tobytes())
+
+    def close(self):
+        """Записывает индекс и заголовок и закрывает файл."""
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        offsets = array('Q', self._offsets)
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        self._file.write(offsets.tobytes())
+        self._file.seek(0)
+        self._file.write(_FILE_HEADER.pack(MAGIC, VERSION, 0, len(self._offsets), index_offset))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BinaryArchive:
+    """Двоичный архив, отображённый в память: любая партия и любой полуход без чтения всего файла."""
+
+    def __init__(self, path):
+        """Открывает архив.
+
+        Args:
+            path (str): Имя файла архива.
+
+        Raises:
+            ValueError: Если файл не является двоичным архивом.
+        """
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, index_offset = _FILE_HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} не является двоичным архивом партий")
+        self._count = count
+        self._index_offset = index_offset
+
+    def close(self):
+        """Закрывает отображение и файл."""
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def _offset(self, n):
+        """Смещение партии n с проверкой номера."""
+        if not 0 <= n < self._count:
+            raise IndexError(f"В архиве {self._count} партий, номер {n} вне диапазона")
+        return _OFFSET.unpack_from(self._map, self._index_offset + _OFFSET.size * n)[0]
+
+    def packed_moves(self, n):
+        """Возвращает ходы партии n как массив упакованных ходов (core.pack_move).
+
+        Args:
+            n (int): Номер партии с нуля.
+
+        Returns:
+            tuple: Вариант игры и array('H') ходов.
+        """
+        offset = self._offset(n)
+        variant, _, count = _GAME_HEADER.unpack_from(self._map, offset)
+        start = offset + _GAME_HEADER.size
+        moves = _little_endian(array('H', self._map[start:start + 2 * count]))
+        return VARIANTS[variant], moves
+
+    def is_plain(self, n):
+        """Проверяет, была ли партия n записана в тексте без строки-разделителя.
+
+        Args:
+            n (int): Номер партии с нуля.
+
+        Returns:
+            bool: True для партии из обычного файла save.
+        """
+        return bool(_GAME_HEADER.unpack_from(self._map, self._offset(n))[1] & PLAIN)
+
+    def game(self, n):
+        """Возвращает партию n.
+
+        Args:
+            n (int): Номер партии с нуля.
+
+        Returns:
+            archive.ArchiveGame: Партия с ходами в нотации.
+        """
+        variant, moves = self.packed_moves(n)
+        names = []
+        for move in moves:
+            frm, to = unpack_move(move)
+            names.append((SQUARE_NAMES[frm], SQUARE_NAMES[to]))
+        return ArchiveGame(n, variant, names)
+
+    def __iter__(self):
+        for n in range(self._count):
+            yield self.game(n)
+
+    def position(self, n, ply=None):
+        """Возвращает доску после первых ply полуходов партии n.
+
+        Args:
+            n (int): Номер партии с нуля.
+            ply (int): Число полуходов от начала партии (по умолчанию — все).
+
+        Returns:
+            Board: Доска в нужной позиции.
+
+        Raises:
+            IndexError: Если в партии меньше ply полуходов.
+        """
+        from chesss import Board
+
+        variant, moves = self.packed_moves(n)
+        if ply is None:
+            ply = len(moves)
+        if not 0 <= ply <= len(moves):
+            raise IndexError(f"В партии {n} {len(moves)} полуходов, полуход {ply} вне диапазона")
+        board = Board(game_type=variant)
+        for move in moves[:ply]:
+            frm, to = unpack_move(move)
+            board.make_move(SQUARE_NAMES[frm], SQUARE_NAMES[to])
+        return board
+
+
+def is_binary(path):
+    """Проверяет, начинается ли файл с сигнатуры двоичного архива."""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def text_to_binary(src, dst, variant='chess'):
+    """Переводит текстовый архив или файл save в двоичный архив.
+
+    Каждая партия проигрывается с проверкой ходов (archive.replay). Архив
+    пишется во временный файл рядом с dst и переименовывается в dst только
+    после успешной записи всех партий, так что при ошибке dst не меняется.
+
+    Args:
+        src (str): Текстовый файл.
+        dst (str): Двоичный файл.
+        variant (str): Вариант для партии без строки-разделителя.
+
+    Returns:
+        int: Число партий.
+
+    Raises:
+        ValueError: Если в партии есть недопустимый ход.
+    """
+    plain = not starts_with_delimiter(src)
+    count = 0
+    partial = dst + '.part'
+    try:
+        with BinaryArchiveWriter(partial) as writer:
+            for game in iter_games(src, variant):
+                for _ in replay(game):
+                    pass
+                writer.add_game(game.variant, game.moves, plain and game.index == 0)
+                count += 1
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    os.replace(partial, dst)
+    return count
+
+
+def binary_to_text(src, dst):
+    """Переводит двоичный архив в текстовый, восстанавливая символы фигур.
+
+    Args:
+        src (str): Двоичный файл.
+        dst (str): Текстовый файл.
+
+    Returns:
+        int: Число партий.
+    """
+    with BinaryArchive(src) as archive, open(dst, 'w') as f:
+        for n in range(len(archive)):
+            board = archive.position(n)
+            write_game(f, board.game_type, board.move_history.notation, not archive.is_plain(n))
+        return len(archive)
+
+
+def run(args):
+    """Выполняет команду convert из командной строки.
+
+    Направление определяется по исходному файлу: двоичный архив переводится
+    в текст, текстовый — в двоичный формат.
+
+    Args:
+        args (argparse.Namespace): Аргументы src, dst и variant.
+
+    Returns:
+        int: Код завершения (1, если в партии есть недопустимый ход).
+    """
+    if is_binary(args.src):
+        count = binary_to_text(args.src, args.dst)
+    else:
+        try:
+            count = text_to_binary(args.src, args.dst, args.variant)
+        except ValueError as error:
+            print(f"Не удалось перевести архив: {error}")
+            return 1
+    print(f"Партий: {count}")
+    return 0
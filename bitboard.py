@@ -0,0 +1,627 @@
+"""Генератор ходов на битбордах.
+
+Битборд — целое число, в котором бит ``sq`` установлен, если клетка ``sq``
+(в нумерации ``core``) входит в множество. Атаки всех фигур берутся из
+заранее построенных таблиц, поэтому ходы целой стороны получаются за один
+проход по её фигурам без разбора строковых позиций.
+"""
+
+import os
+from array import array
+
+from core import ARCHER, BISHOP, BLACK, DRAGON, KING, KNIGHT, PAWN, QUEEN, ROOK, TYPE_MASK, WIZARD
+
+FULL = (1 << 64) - 1
+RANK_3 = 0xFF << 40
+RANK_6 = 0xFF << 16
+
+KNIGHT_OFFSETS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+ARCHER_SHOT_OFFSETS = ((-2, -2), (-2, 2), (2, -2), (2, 2))
+ROOK_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+BISHOP_DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+LEAPER_OFFSETS = {
+    KNIGHT: KNIGHT_OFFSETS,
+    KING: KING_OFFSETS,
+    WIZARD: KNIGHT_OFFSETS + KING_OFFSETS,
+    ARCHER: ARCHER_SHOT_OFFSETS,
+}
+
+_leaper_squares = {}
+_leaper_masks = {}
+
+
+def leaper_squares(kind):
+    """Возвращает таблицу целевых клеток прыгающей фигуры.
+
+    Таблица строится при первом обращении и затем переиспользуется. Для
+    стрелка она описывает только выстрел на две клетки по диагонали.
+
+    Args:
+        kind (int): Тип фигуры (KNIGHT, KING, WIZARD или ARCHER).
+
+    Returns:
+        tuple: Для каждой из 64 клеток — кортеж клеток, куда возможен прыжок.
+    """
+    table = _leaper_squares.get(kind)
+    if table is None:
+        rows = []
+        for sq in range(64):
+            row, col = sq >> 3, sq & 7
+            rows.append(tuple((row + dr) * 8 + col + dc for dr, dc in LEAPER_OFFSETS[kind]
+                              if 0 <= row + dr < 8 and 0 <= col + dc < 8))
+        table = _leaper_squares[kind] = tuple(rows)
+    return table
+
+
+def leaper_masks(kind):
+    """Возвращает ту же таблицу, что и leaper_squares, в виде битбордов.
+
+    Args:
+        kind (int): Тип фигуры (KNIGHT, KING, WIZARD или ARCHER).
+
+    Returns:
+        tuple: 64 битборда целевых клеток.
+    """
+    table = _leaper_masks.get(kind)
+    if table is None:
+        masks = []
+        for targets in leaper_squares(kind):
+            bb = 0
+            for to in targets:
+                bb |= 1 << to
+            masks.append(bb)
+        table = _leaper_masks[kind] = tuple(masks)
+    return table
+
+
+def _ray_table(dr, dc):
+    """Строит лучи от каждой клетки в заданном направлении (без самой клетки).
+
+    Args:
+        dr (int): Шаг по строке.
+        dc (int): Шаг по столбцу.
+
+    Returns:
+        list: 64 битборда лучей.
+    """
+    table = []
+    for sq in range(64):
+        r, c = (sq >> 3) + dr, (sq & 7) + dc
+        bb = 0
+        while 0 <= r < 8 and 0 <= c < 8:
+            bb |= 1 << (r * 8 + c)
+            r += dr
+            c += dc
+        table.append(bb)
+    return table
+
+
+def _pawn_table(direction):
+    """Строит битборды клеток взятия пешки, идущей в направлении direction."""
+    table = []
+    for sq in range(64):
+        row, col = sq >> 3, sq & 7
+        bb = 0
+        for dc in (-1, 1):
+            if 0 <= row + direction < 8 and 0 <= col + dc < 8:
+                bb |= 1 << ((row + direction) * 8 + col + dc)
+        table.append(bb)
+    return table
+
+
+PAWN_ATTACKS = (_pawn_table(-1), _pawn_table(1))
+
+ROOK_RAYS = [(_ray_table(dr, dc), dr * 8 + dc > 0) for dr, dc in ROOK_DIRECTIONS]
+BISHOP_RAYS = [(_ray_table(dr, dc), dr * 8 + dc > 0) for dr, dc in BISHOP_DIRECTIONS]
+
+
+def _slide(rays, sq, occupied):
+    """Возвращает атаки дальнобойной фигуры вдоль набора лучей.
+
+    Луч обрезается за первой занятой клеткой; сама занятая клетка остаётся
+    в множестве атак.
+    """
+    attacks = 0
+    for table, positive in rays:
+        ray = table[sq]
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= table[first]
+        attacks |= ray
+    return attacks
+
+
+def _relevant_mask(rays, sq):
+    """Возвращает клетки лучей, занятость которых влияет на атаки с клетки sq.
+
+    Последняя клетка каждого луча не влияет на результат: она атакована
+    независимо от того, занята ли она.
+    """
+    mask = 0
+    for table, positive in rays:
+        ray = table[sq]
+        if ray:
+            edge = ray.bit_length() - 1 if positive else (ray & -ray).bit_length() - 1
+            mask |= ray ^ (1 << edge)
+    return mask
+
+
+def _build_slider_table(rays):
+    """Строит таблицы атак, индексированные занятостью значимых клеток.
+
+    Returns:
+        tuple: Список масок значимых клеток и список словарей
+        {занятость & маска: атаки} для каждой из 64 клеток.
+    """
+    masks = []
+    tables = []
+    for sq in range(64):
+        mask = _relevant_mask(rays, sq)
+        masks.append(mask)
+        tables.append({subset: _slide(rays, sq, subset) for subset in _subsets(mask)})
+    return masks, tables
+
+
+def _subsets(mask):
+    """Перечисляет все подмножества маски, начиная с пустого, в постоянном порядке."""
+    subset = 0
+    while True:
+        yield subset
+        subset = (subset - mask) & mask
+        if not subset:
+            return
+
+
+SLIDER_CACHE_ENV = 'CHESS_SLIDER_CACHE'
+SLIDER_CACHE_VERSION = 2
+
+
+def _pack_slider_tables(tables):
+    """Упаковывает таблицы атак в array('Q') для файла кэша.
+
+    Хранятся только номер версии и атаки в порядке _subsets для каждой
+    клетки: маски и ключи таблиц однозначно восстанавливаются по лучам.
+    """
+    _, rook_table, _, bishop_table = tables
+    values = array('Q', [SLIDER_CACHE_VERSION])
+    for table in (rook_table, bishop_table):
+        for square_table in table:
+            values.extend(square_table.values())
+    return values
+
+
+def _unpack_slider_tables(data):
+    """Восстанавливает таблицы атак из содержимого файла кэша.
+
+    Args:
+        data (bytes): Содержимое файла, записанного _pack_slider_tables.
+
+    Returns:
+        tuple: Маски и таблицы ладьи, затем маски и таблицы слона.
+
+    Raises:
+        ValueError: Если версия или размер данных не совпадают с ожидаемыми.
+    """
+    values = array('Q')
+    values.frombytes(data)
+    if not values or values[0] != SLIDER_CACHE_VERSION:
+        raise ValueError("другая версия кэша таблиц атак")
+    position = 1
+    tables = ()
+    for rays in (ROOK_RAYS, BISHOP_RAYS):
+        masks = []
+        square_tables = []
+        for sq in range(64):
+            mask = _relevant_mask(rays, sq)
+            subsets = list(_subsets(mask))
+            chunk = values[position:position + len(subsets)]
+            if len(chunk) != len(subsets):
+                raise ValueError("кэш таблиц атак обрезан")
+            masks.append(mask)
+            square_tables.append(dict(zip(subsets, chunk)))
+            position += len(subsets)
+        tables += (masks, square_tables)
+    if position != len(values):
+        raise ValueError("лишние данные в кэше таблиц атак")
+    return tables
+
+_rook_masks = _rook_table = _bishop_masks = _bishop_table = None
+
+
+def load_slider_tables(cache_path=None):
+    """Загружает или строит таблицы атак ладьи и слона.
+
+    Таблицы строятся один раз за процесс. Если указан путь к кэшу (или он
+    задан переменной окружения CHESS_SLIDER_CACHE), таблицы читаются из
+    файла — массива чисел, а не pickle, так что чужой файл не может
+    выполнить код. Если файла нет или он не проходит проверку версии и
+    размера, таблицы строятся заново и сохраняются туда.
+
+    Args:
+        cache_path (str): Путь к файлу кэша на диске.
+
+    Returns:
+        tuple: Маски и таблицы ладьи, затем маски и таблицы слона.
+    """
+    global _rook_masks, _rook_table, _bishop_masks, _bishop_table
+    if _rook_table is not None:
+        return _rook_masks, _rook_table, _bishop_masks, _bishop_table
+
+    if cache_path is None:
+        cache_path = os.environ.get(SLIDER_CACHE_ENV)
+    tables = None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                tables = _unpack_slider_tables(f.read())
+        except (OSError, ValueError):
+            tables = None
+    if tables is None:
+        tables = _build_slider_table(ROOK_RAYS) + _build_slider_table(BISHOP_RAYS)
+        if cache_path:
+            try:
+                with open(cache_path, 'wb') as f:
+                    _pack_slider_tables(tables).tofile(f)
+            except OSError:
+                pass
+
+    _rook_masks, _rook_table, _bishop_masks, _bishop_table = tables
+    return tables
+
+
+def rook_attacks(sq, occupied):
+    """Атаки ладьи с клетки sq при заданной занятости доски."""
+    if _rook_table is None:
+        load_slider_tables()
+    return _rook_table[sq][occupied & _rook_masks[sq]]
+
+
+def bishop_attacks(sq, occupied):
+    """Атаки слона с клетки sq при заданной занятости доски."""
+    if _bishop_table is None:
+        load_slider_tables()
+    return _bishop_table[sq][occupied & _bishop_masks[sq]]
+
+
+def queen_attacks(sq, occupied):
+    """Атаки ферзя с клетки sq при заданной занятости доски."""
+    if _rook_table is None:
+        load_slider_tables()
+    return _rook_table[sq][occupied & _rook_masks[sq]] | _bishop_table[sq][occupied & _bishop_masks[sq]]
+
+
+def attacks(code, sq, occupied):
+    """Возвращает множество клеток, которые бьёт фигура.
+
+    Для пешки это диагональные клетки взятия, для стрелка — лучи слона
+    вместе с клетками выстрела.
+
+    Args:
+        code (int): Код фигуры.
+        sq (int): Клетка, на которой стоит фигура.
+        occupied (int): Битборд занятых клеток.
+
+    Returns:
+        int: Битборд атакованных клеток.
+    """
+    kind = code & TYPE_MASK
+    if kind == PAWN:
+        return PAWN_ATTACKS[1 if code & BLACK else 0][sq]
+    if kind == KNIGHT or kind == KING or kind == WIZARD:
+        return leaper_masks(kind)[sq]
+    if kind == BISHOP:
+        return bishop_attacks(sq, occupied)
+    if kind == ROOK:
+        return rook_attacks(sq, occupied)
+    if kind == QUEEN:
+        return queen_attacks(sq, occupied)
+    if kind == DRAGON:
+        return rook_attacks(sq, occupied) | leaper_masks(KNIGHT)[sq]
+    if kind == ARCHER:
+        return bishop_attacks(sq, occupied) | leaper_masks(ARCHER)[sq]
+    return 0
+
+
+_WHITE_BITS = bytes(ord('1') if code and not code & BLACK else ord('0') for code in range(256))
+_BLACK_BITS = bytes(ord('1') if code & BLACK else ord('0') for code in range(256))
+_OCCUPIED_BITS = bytes(ord('1') if code else ord('0') for code in range(256))
+
+
+def occupancy(squares):
+    """Строит битборды занятости по массиву кодов фигур.
+
+    Args:
+        squares (bytearray): Коды фигур на 64 клетках.
+
+    Returns:
+        tuple: Битборды белых и чёрных фигур.
+    """
+    return (int(squares.translate(_WHITE_BITS)[::-1], 2),
+            int(squares.translate(_BLACK_BITS)[::-1], 2))
+
+
+def occupied(squares):
+    """Возвращает битборд всех занятых клеток.
+
+    Args:
+        squares (bytearray): Коды фигур на 64 клетках.
+
+    Returns:
+        int: Битборд занятых клеток.
+    """
+    return int(squares.translate(_OCCUPIED_BITS)[::-1], 2)
+
+
+def bit_squares(bb):
+    """Возвращает список клеток битборда в порядке возрастания индекса.
+
+    Args:
+        bb (int): Битборд.
+
+    Returns:
+        list: Индексы установленных битов.
+    """
+    result = []
+    while bb:
+        bit = bb & -bb
+        bb ^= bit
+        result.append(bit.bit_length() - 1)
+    return result
+
+
+def side_targets(squares, color, only=FULL, within=FULL):
+    """Перечисляет фигуры стороны вместе с клетками, куда они могут пойти.
+
+    Занятость доски и таблицы атак берутся один раз на весь проход.
+
+    Args:
+        squares (bytearray): Коды фигур на 64 клетках (Board.squares).
+        color (str): 'white' или 'black'.
+        only (int): Битборд клеток, фигуры на которых нужно перечислить
+            (по умолчанию — все).
+        within (int): Битборд допустимых целевых клеток; например, клетки
+            соперника дают только взятия, и ходы пешек вперёд не считаются.
+
+    Yields:
+        tuple: Клетка фигуры и битборд её целевых клеток.
+    """
+    white, black = occupancy(squares)
+    occupied = white | black
+    empty = ~occupied & FULL
+    if color == 'white':
+        own, enemy, own_flag = white, black, 0
+    else:
+        own, enemy, own_flag = black, white, BLACK
+    not_own = ~own & within
+    captures = enemy & within
+    quiet = empty & within
+    rook_masks, rook_table, bishop_masks, bishop_table = load_slider_tables()
+    knight_masks = leaper_masks(KNIGHT)
+    archer_shots = leaper_masks(ARCHER)
+
+    pieces = own & only
+    while pieces:
+        bit = pieces & -pieces
+        pieces ^= bit
+        frm = bit.bit_length() - 1
+        kind = squares[frm] & TYPE_MASK
+
+        if kind == PAWN:
+            if own_flag:
+                targets = PAWN_ATTACKS[1][frm] & captures
+                if quiet:
+                    step = (bit << 8) & empty
+                    targets |= (step | ((step & RANK_6) << 8) & empty) & quiet
+            else:
+                targets = PAWN_ATTACKS[0][frm] & captures
+                if quiet:
+                    step = (bit >> 8) & empty
+                    targets |= (step | ((step & RANK_3) >> 8) & empty) & quiet
+        elif kind == ROOK:
+            targets = rook_table[frm][occupied & rook_masks[frm]] & not_own
+        elif kind == BISHOP:
+            targets = bishop_table[frm][occupied & bishop_masks[frm]] & not_own
+        elif kind == QUEEN:
+            targets = (rook_table[frm][occupied & rook_masks[frm]]
+                       | bishop_table[frm][occupied & bishop_masks[frm]]) & not_own
+        elif kind == DRAGON:
+            targets = (rook_table[frm][occupied & rook_masks[frm]] | knight_masks[frm]) & not_own
+        elif kind == ARCHER:
+            targets = (bishop_table[frm][occupied & bishop_masks[frm]] & not_own) | (archer_shots[frm] & captures)
+        else:
+            targets = leaper_masks(kind)[frm] & not_own
+        if targets:
+            yield frm, targets
+
+
+def generate_moves(squares, color):
+    """Генерирует все ходы стороны за один проход по доске.
+
+    Args:
+        squares (bytearray): Коды фигур на 64 клетках (Board.squares).
+        color (str): 'white' или 'black'.
+
+    Returns:
+        list: Ходы, упакованные как в core.pack_move.
+    """
+    moves = []
+    append = moves.append
+    for frm, targets in side_targets(squares, color):
+        while targets:
+            to_bit = targets & -targets
+            targets ^= to_bit
+            append(frm | (to_bit.bit_length() - 1) << 6)
+    return moves
+
+
+def generate_moves_into(squares, color, moves):
+    """Записывает все ходы стороны в заранее выделенный массив.
+
+    Массив заполняется с начала и растёт, только если ходов больше его длины.
+
+    Args:
+        squares (bytearray): Коды фигур на 64 клетках (Board.squares).
+        color (str): 'white' или 'black'.
+        moves (array): Массив array('H') для упакованных ходов (core.pack_move).
+
+    Returns:
+        int: Число записанных ходов.
+    """
+    count = 0
+    for frm, targets in side_targets(squares, color):
+        while targets:
+            to_bit = targets & -targets
+            targets ^= to_bit
+            try:
+                moves[count] = frm | (to_bit.bit_length() - 1) << 6
+            except IndexError:
+                moves.append(frm | (to_bit.bit_length() - 1) << 6)
+            count += 1
+    return count
+
+
+_between = None
+
+# Дальнобойные фигуры, бьющие вдоль линий ладьи и слона: только они могут связать фигуру.
+ROOK_LINE_KINDS = (ROOK, QUEEN, DRAGON)
+BISHOP_LINE_KINDS = (BISHOP, QUEEN, ARCHER)
+
+
+def between_masks():
+    """Возвращает таблицу клеток между двумя клетками одной линии.
+
+    Таблица строится при первом обращении.
+
+    Returns:
+        tuple: 64 словаря {клетка: битборд клеток строго между ними}; клетки,
+        не лежащие на одной вертикали, горизонтали или диагонали, в словарь
+        не входят.
+    """
+    global _between
+    if _between is None:
+        rows = []
+        for sq in range(64):
+            row = {}
+            for table, _ in ROOK_RAYS + BISHOP_RAYS:
+                for to in bit_squares(table[sq]):
+                    row[to] = table[sq] ^ table[to] ^ (1 << to)
+            rows.append(row)
+        _between = tuple(rows)
+    return _between
+
+
+def attacked_squares(squares, color, occupied):
+    """Возвращает все клетки, которые бьёт сторона.
+
+    Args:
+        squares (bytearray): Коды фигур на 64 клетках.
+        color (str): Атакующая сторона ('white' или 'black').
+        occupied (int): Битборд занятых клеток, по которому считаются лучи.
+
+    Returns:
+        int: Битборд атакованных клеток.
+    """
+    flag = BLACK if color == 'black' else 0
+    result = 0
+    for sq, code in enumerate(squares):
+        if code and (code & BLACK) == flag:
+            result |= attacks(code, sq, occupied)
+    return result
+
+
+def checks_and_pins(squares, color):
+    """Находит шахи и связки для стороны за один проход от её короля.
+
+    Шах от дальнобойной фигуры можно закрыть, шах от прыгающей фигуры — нет;
+    выстрел стрелка через клетку по диагонали тоже не закрывается, как прыжок
+    коня. Связать фигуру могут ладья, ферзь и дракон по вертикали и
+    горизонтали, слон, ферзь и стрелок — по диагонали.
+
+    Args:
+        squares (bytearray): Коды фигур на 64 клетках.
+        color (str): Сторона, для короля которой ищутся шахи.
+
+    Returns:
+        tuple: Клетка короля (-1, если короля нет); битборд шахующих фигур;
+        битборд клеток, ход на которые не королём снимает шах (взятие
+        шахующей фигуры или перекрытие; FULL без шаха); словарь {клетка
+        связанной фигуры: битборд клеток линии связки, включая связывающую
+        фигуру}.
+    """
+    own_flag = BLACK if color == 'black' else 0
+    king = squares.find(KING | own_flag)
+    if king < 0:
+        return -1, 0, FULL, {}
+    white, black = occupancy(squares)
+    occupied = white | black
+    enemy = white if own_flag else black
+    between = between_masks()[king]
+    king_bit = 1 << king
+
+    checkers = 0
+    evasions = 0
+    for sq in bit_squares(enemy):
+        code = squares[sq]
+        if attacks(code, sq, occupied) & king_bit:
+            checkers |= 1 << sq
+            evasions |= 1 << sq
+            line = between.get(sq, 0)
+            if line and not attacks(code, sq, occupied | line) & king_bit:
+                evasions |= line
+    if not checkers:
+        evasions = FULL
+
+    pins = {}
+    for rays, kinds in ((ROOK_RAYS, ROOK_LINE_KINDS), (BISHOP_RAYS, BISHOP_LINE_KINDS)):
+        for table, positive in rays:
+            blockers = table[king] & occupied
+            if not blockers:
+                continue
+            first = (blockers & -blockers) if positive else 1 << blockers.bit_length() - 1
+            if first & enemy:
+                continue
+            blockers ^= first
+            if not blockers:
+                continue
+            second = (blockers & -blockers) if positive else 1 << blockers.bit_length() - 1
+            pinner = second.bit_length() - 1
+            if second & enemy and squares[pinner] & TYPE_MASK in kinds:
+                pins[first.bit_length() - 1] = between[pinner] | second
+    return king, checkers, evasions, pins
+
+
+def generate_legal_moves(squares, color):
+    """Генерирует ходы стороны, после которых её король не под боем.
+
+    Псевдолегальные ходы generate_moves отбираются по шахам и связкам,
+    найденным один раз для позиции, без выполнения и отмены ходов. Если
+    короля на доске нет, возвращаются все псевдолегальные ходы.
+
+    Args:
+        squares (bytearray): Коды фигур на 64 клетках (Board.squares).
+        color (str): 'white' или 'black'.
+
+    Returns:
+        list: Ходы, упакованные как в core.pack_move.
+    """
+    moves = generate_moves(squares, color)
+    king, checkers, evasions, pins = checks_and_pins(squares, color)
+    if king < 0:
+        return moves
+    danger = attacked_squares(squares, 'white' if color == 'black' else 'black', occupied(squares) & ~(1 << king))
+    double_check = checkers & (checkers - 1)
+    legal = []
+    for move in moves:
+        frm, to = move & 63, move >> 6
+        if frm == king:
+            if not danger >> to & 1:
+                legal.append(move)
+        elif not double_check and evasions >> to & 1 and pins.get(frm, FULL) >> to & 1:
+            legal.append(move)
+    return legal
@@ -0,0 +1,445 @@
+"""Генератор ходов и движок для шашек на 32 тёмных клетках.
+
+Позиция хранится тремя 32-битными масками (белые, чёрные, дамки) и хешем
+Zobrist, совпадающим с Board.hash. Ход — полная последовательность клеток
+(с серией взятий) и маска взятых шашек. Правила те же, что у фигур Checker и
+KingChecker: простая шашка ходит и бьёт вперёд, дамка ходит на любое
+расстояние и после взятия встаёт сразу за побитой шашкой. Взятие обязательно,
+серия продолжается, пока есть что бить; шашка, дошедшая до последней
+горизонтали посреди серии, продолжает бить уже как дамка.
+"""
+
+import time
+
+from core import BLACK, CHECKER, KING_CHECKER, SQUARE_NAMES, TYPE_MASK, pack_move
+from engine import (INFINITY, MATE, MATE_BOUND, MAX_PLY, SearchResult, SearchTimeout, score_from_table,
+                    score_to_table)
+from evaluation import PIECE_VALUES
+from moves import CONTINUES, move_to
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
+from zobrist import BLACK_TO_MOVE, PIECE_KEYS
+
+FULL32 = (1 << 32) - 1
+
+SQ64 = tuple(row * 8 + col for row in range(8) for col in range(8) if (row + col) % 2 == 1)
+SQ32 = {sq: i for i, sq in enumerate(SQ64)}
+
+DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+FORWARD = {'white': (0, 1), 'black': (2, 3)}
+PROMOTION = {'white': 0xF, 'black': 0xF << 28}
+
+
+def _rays():
+    """Строит лучи по четырём диагоналям из каждой из 32 клеток.
+
+    Returns:
+        tuple: Для каждой клетки — четыре кортежа клеток вдоль направления.
+    """
+    rays = []
+    for sq in SQ64:
+        row, col = sq >> 3, sq & 7
+        per_square = []
+        for dr, dc in DIRECTIONS:
+            ray = []
+            r, c = row + dr, col + dc
+            while 0 <= r < 8 and 0 <= c < 8:
+                ray.append(SQ32[r * 8 + c])
+                r += dr
+                c += dc
+            per_square.append(tuple(ray))
+        rays.append(tuple(per_square))
+    return tuple(rays)
+
+
+RAYS = _rays()
+
+_KEYS = {code: tuple(PIECE_KEYS[code][sq] for sq in SQ64)
+         for code in (CHECKER, CHECKER | BLACK, KING_CHECKER, KING_CHECKER | BLACK)}
+
+# Прибавка простой шашке за каждую пройденную горизонталь.
+ADVANCE_BONUS = 3
+
+
+def _bits(mask):
+    """Перечисляет индексы установленных битов маски."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _count(mask):
+    """Число установленных битов маски."""
+    return bin(mask).count('1')
+
+
+def _masks(squares):
+    """Собирает маски белых, чёрных и дамок по кодам 64 клеток."""
+    white = black = kings = 0
+    for i, sq in enumerate(SQ64):
+        code = squares[sq]
+        if code:
+            if code & BLACK:
+                black |= 1 << i
+            else:
+                white |= 1 << i
+            if code & TYPE_MASK == KING_CHECKER:
+                kings |= 1 << i
+    return white, black, kings
+
+
+def position_from_board(board):
+    """Переводит шашечную доску в компактную позицию.
+
+    Args:
+        board (Board): Шашечная доска.
+
+    Returns:
+        tuple: Маски белых, чёрных и дамок и хеш позиции.
+    """
+    return _masks(board.squares) + (board.hash,)
+
+
+def generate_moves(position, color, start=None):
+    """Генерирует все допустимые ходы стороны.
+
+    Если есть хотя бы одно взятие, возвращаются только взятия, каждое —
+    с максимальным продолжением серии.
+
+    Args:
+        position (tuple): Позиция из position_from_board.
+        color (str): 'white' или 'black'.
+        start (int): Если задано — только взятия шашкой с этой клетки
+            (продолжение начатой серии; номер клетки из 32).
+
+    Returns:
+        list: Ходы вида (клетки пути, маска взятых шашек).
+    """
+    white, black, kings = position[0], position[1], position[2]
+    own, enemy = (white, black) if color == 'white' else (black, white)
+    empty = ~(white | black) & FULL32
+    forward = FORWARD[color]
+    promotion = PROMOTION[color]
+
+    pieces = own if start is None else own & 1 << start
+    captures = []
+    for sq in _bits(pieces):
+        _jumps([sq], sq, bool(kings >> sq & 1), enemy, empty, 0, forward, promotion, captures)
+    if captures or start is not None:
+        return captures
+
+    moves = []
+    for sq in _bits(own):
+        if kings >> sq & 1:
+            for ray in RAYS[sq]:
+                for to in ray:
+                    if not empty >> to & 1:
+                        break
+                    moves.append(((sq, to), 0))
+        else:
+            for d in forward:
+                ray = RAYS[sq][d]
+                if ray and empty >> ray[0] & 1:
+                    moves.append(((sq, ray[0]), 0))
+    return moves
+
+
+def _jumps(path, sq, king, enemy, empty, captured, forward, promotion, out):
+    """Рекурсивно продолжает серию взятий с клетки sq."""
+    extended = False
+    for d in (0, 1, 2, 3) if king else forward:
+        ray = RAYS[sq][d]
+        i = 0
+        if king:
+            while i < len(ray) and empty >> ray[i] & 1:
+                i += 1
+        if i + 1 < len(ray) and enemy >> ray[i] & 1 and empty >> ray[i + 1] & 1:
+            taken, land = 1 << ray[i], ray[i + 1]
+            path.append(land)
+            _jumps(path, land, king or bool(promotion >> land & 1), enemy ^ taken,
+                   (empty | 1 << sq | taken) & ~(1 << land), captured | taken, forward, promotion, out)
+            path.pop()
+            extended = True
+    if not extended and len(path) > 1:
+        out.append((tuple(path), captured))
+
+
+def make_move(position, move, color):
+    """Возвращает позицию после хода.
+
+    Args:
+        position (tuple): Исходная позиция.
+        move (tuple): Ход из generate_moves.
+        color (str): Сторона, делающая ход.
+
+    Returns:
+        tuple: Новая позиция с обновлённым хешем.
+    """
+    white, black, kings, key = position
+    path, captured = move
+    frm, to = path[0], path[-1]
+    was_king = kings >> frm & 1
+    king = was_king or any(PROMOTION[color] >> sq & 1 for sq in path)
+    side = 0 if color == 'white' else BLACK
+
+    key ^= _KEYS[(KING_CHECKER if was_king else CHECKER) | side][frm]
+    key ^= _KEYS[(KING_CHECKER if king else CHECKER) | side][to]
+    for sq in _bits(captured):
+        key ^= _KEYS[(KING_CHECKER if kings >> sq & 1 else CHECKER) | (BLACK ^ side)][sq]
+    key ^= BLACK_TO_MOVE
+
+    moved = 1 << frm | 1 << to
+    if color == 'white':
+        white ^= moved
+        black &= ~captured
+    else:
+        black ^= moved
+        white &= ~captured
+    kings &= ~captured & ~(1 << frm)
+    if king:
+        kings |= 1 << to
+    return white, black, kings, key
+
+
+def evaluate(position, color):
+    """Оценка позиции с точки зрения стороны color.
+
+    Args:
+        position (tuple): Позиция.
+        color (str): 'white' или 'black'.
+
+    Returns:
+        int: Материал и продвижение простых шашек в сантипешках.
+    """
+    white, black, kings = position[0], position[1], position[2]
+    man, king = PIECE_VALUES[CHECKER], PIECE_VALUES[KING_CHECKER]
+    score = (man * _count(white & ~kings) + king * _count(white & kings)
+             - man * _count(black & ~kings) - king * _count(black & kings))
+    for sq in _bits(white & ~kings):
+        score += ADVANCE_BONUS * (7 - (SQ64[sq] >> 3))
+    for sq in _bits(black & ~kings):
+        score -= ADVANCE_BONUS * (SQ64[sq] >> 3)
+    return score if color == 'white' else -score
+
+
+def path_names(path):
+    """Переводит путь хода в клетки в нотации.
+
+    Args:
+        path (tuple): Клетки пути (номера из 32).
+
+    Returns:
+        tuple: Клетки в нотации (например, ('c3', 'e5', 'g7')).
+    """
+    return tuple(SQUARE_NAMES[SQ64[sq]] for sq in path)
+
+
+def continuation_square(board):
+    """Возвращает клетку шашки, которая обязана продолжить серию взятий.
+
+    Серия продолжается, если последний ход помечен флагом CONTINUES.
+
+    Args:
+        board (Board): Шашечная доска.
+
+    Returns:
+        int: Номер клетки из 32 или None.
+    """
+    if not board.move_history or not board.move_history[-1] & CONTINUES:
+        return None
+    return SQ32[move_to(board.move_history[-1])]
+
+
+def legal_moves(board):
+    """Возвращает допустимые ходы стороны, чей ход на доске.
+
+    Args:
+        board (Board): Шашечная доска.
+
+    Returns:
+        list: Ходы вида (клетки пути, маска взятых шашек).
+    """
+    return generate_moves(position_from_board(board), board.turn, continuation_square(board))
+
+
+def can_continue(squares, sq):
+    """Проверяет, может ли шашка на клетке sq продолжить серию взятий.
+
+    Args:
+        squares (bytearray): Коды фигур на 64 клетках.
+        sq (int): Индекс клетки (из 64).
+
+    Returns:
+        bool: True, если у шашки есть взятие.
+    """
+    code = squares[sq]
+    if not code or sq not in SQ32:
+        return False
+    color = 'black' if code & BLACK else 'white'
+    return bool(generate_moves(_masks(squares) + (0,), color, SQ32[sq]))
+
+
+class CheckersEngine:
+    """Движок для шашек; каждый экземпляр хранит собственные таблицы."""
+
+    def __init__(self, tt_mb=16):
+        """Создаёт движок.
+
+        Args:
+            tt_mb (float): Размер таблицы транспозиций в мегабайтах.
+        """
+        self.table = TranspositionTable(tt_mb)
+        self.nodes = 0
+        self._deadline = None
+        self._history = {}
+
+    def search(self, board, depth=None, movetime=None):
+        """Ищет лучший ход для стороны, чей ход на доске.
+
+        Args:
+            board (Board): Шашечная доска; не изменяется.
+            depth (int): Максимальная глубина в ходах (серия взятий — один ход).
+            movetime (float): Ограничение времени в секундах.
+
+        Returns:
+            SearchResult: Лучший ход как путь клеток в нотации (пустой
+            кортеж, если ходов нет), оценка, достигнутая глубина, число
+            узлов, время и главный вариант.
+        """
+        if depth is None:
+            depth = MAX_PLY - 1 if movetime else 8
+        started = time.perf_counter()
+        self._deadline = started + movetime if movetime else None
+        self.nodes = 0
+        self._history.clear()
+        self.table.new_search()
+
+        position = position_from_board(board)
+        color = board.turn
+        moves = legal_moves(board)
+        result = SearchResult((), 0, 0, 0, 0.0, [])
+        if not moves:
+            return result
+        for current in range(1, depth + 1):
+            try:
+                score, move = self._root(position, color, moves, current)
+            except SearchTimeout:
+                break
+            elapsed = time.perf_counter() - started
+            pv = self._principal_variation(make_move(position, move, color), _other(color), current - 1)
+            result = SearchResult(path_names(move[0]), score, current, self.nodes, elapsed,
+                                  [path_names(move[0])] + pv)
+            if len(moves) == 1 or abs(score) >= MATE_BOUND:
+                break
+        return result
+
+    def best_move(self, board, depth=None, movetime=None):
+        """Возвращает путь лучшего хода в нотации или None, если ходов нет."""
+        result = self.search(board, depth, movetime)
+        return result.move or None
+
+    def _root(self, position, color, moves, depth):
+        """Перебирает ходы в корне и возвращает оценку и лучший ход."""
+        moves = self._ordered(moves, self._hash_move(position[3]))
+        alpha, beta = -INFINITY, INFINITY
+        best_move = moves[0]
+        for move in moves:
+            score = -self._negamax(make_move(position, move, color), _other(color), depth - 1, -beta, -alpha, 1)
+            if score > alpha:
+                alpha, best_move = score, move
+        self.table.store(position[3], depth, alpha, EXACT, _move_key(best_move))
+        return alpha, best_move
+
+    def _negamax(self, position, color, depth, alpha, beta, ply):
+        """Альфа-бета поиск; при нулевой глубине продолжает только обязательные взятия."""
+        self.nodes += 1
+        if self._deadline is not None and self.nodes & 1023 == 0 and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+
+        key = position[3]
+        entry = self.table.probe(key)
+        hash_move = 0
+        if entry is not None:
+            entry_depth, value, flag, hash_move = entry
+            if entry_depth >= depth:
+                value = score_from_table(value, ply)
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value >= beta:
+                    return value
+                if flag == UPPER and value <= alpha:
+                    return value
+
+        moves = generate_moves(position, color)
+        if not moves:
+            return -MATE + ply
+        if (depth <= 0 and not moves[0][1]) or ply >= MAX_PLY - 1:
+            return evaluate(position, color)
+
+        alpha_start = alpha
+        best, best_move = -INFINITY, moves[0]
+        other = _other(color)
+        for move in self._ordered(moves, hash_move):
+            score = -self._negamax(make_move(position, move, color), other, depth - 1, -beta, -alpha, ply + 1)
+            if score > best:
+                best, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if not move[1]:
+                            history_key = _move_key(move)
+                            self._history[history_key] = self._history.get(history_key, 0) + depth * depth
+                        break
+
+        if best <= alpha_start:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(key, max(depth, 0), score_to_table(best, ply), flag, _move_key(best_move))
+        return best
+
+    def _hash_move(self, key):
+        """Возвращает ход из таблицы транспозиций для позиции с хешем key."""
+        entry = self.table.probe(key)
+        return entry[3] if entry is not None else 0
+
+    def _ordered(self, moves, hash_move):
+        """Сортирует ходы: ход из таблицы, больше взятых шашек, история."""
+        history = self._history
+
+        def priority(move):
+            key = _move_key(move)
+            if key == hash_move:
+                return 1 << 30
+            if move[1]:
+                return (1 << 29) + _count(move[1])
+            return history.get(key, 0)
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def _principal_variation(self, position, color, depth):
+        """Восстанавливает главный вариант по таблице транспозиций."""
+        pv = []
+        for _ in range(depth):
+            hash_move = self._hash_move(position[3])
+            moves = [move for move in generate_moves(position, color) if _move_key(move) == hash_move]
+            if not hash_move or not moves:
+                break
+            pv.append(path_names(moves[0][0]))
+            position = make_move(position, moves[0], color)
+            color = _other(color)
+        return pv
+
+
+def _other(color):
+    """Возвращает противоположный цвет."""
+    return 'black' if color == 'white' else 'white'
+
+
+def _move_key(move):
+    """Упаковывает начальную и конечную клетки хода для таблиц движка."""
+    path = move[0]
+    return pack_move(SQ64[path[0]], SQ64[path[-1]])
+
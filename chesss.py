@@ -1,3 +1,28 @@
+import argparse
+import re
+import sys
+from array import array
+from collections import namedtuple
+
+from archive import iter_games, replay
+from bitboard import attacks, bit_squares, checks_and_pins, generate_legal_moves, generate_moves_into, occupied
+from core import (ARCHER, BISHOP, BLACK, CHECKER, DRAGON, EMPTY, KING_CHECKER, LETTERS, QUEEN, ROOK, SQUARE_NAMES,
+                  TYPE_MASK, piece_codes, square)
+from checkers import SQ64, CheckersEngine, can_continue, continuation_square, legal_moves
+from engine import Engine, format_score, move_names
+from evaluation import SQUARE_SCORES, evaluate
+from moves import CAPTURED_SQUARE_SHIFT, CONTINUES, JUMP, PROMOTION, MoveBuffer, MoveHistory, decode_move, encode_move
+from poscache import CACHE_SIZE, PositionCache
+from smp import parallel_search
+from zobrist import BLACK_TO_MOVE, PIECE_KEYS, position_hash
+
+
+SLIDERS = (BISHOP, ROOK, QUEEN, DRAGON, ARCHER)
+
+_FEN_LETTERS = bytes(ord(letter) for letter in LETTERS) + bytes(224)
+_EMPTY_RUN = re.compile(r'\.+')
+
+
 class Board:
     """Класс, реализующий шахматную или шашечную доску, а также историю ходов."""
 
@@ -8,34 +33,52 @@ class Board:
             game_type (str): Тип игры ('chess' для шахмат, 'checkers' для шашек).
         """
         self.game_type = game_type
-        self.board = self._init_board()
-        self.move_history = []
-        self.redo_history = []
+        self.codes = piece_codes(game_type)
+        self.squares = self._init_board()
+        self.turn = 'white'
+        self.hash = position_hash(self.squares, self.turn)
+        self.score = evaluate(self.squares)
+        self.move_history = MoveHistory()
+        self.redo_history = MoveHistory()
+        self.move_buffer = MoveBuffer()
+        self._hash_deltas = array('Q')
+        self._score_deltas = array('q')
+        self._attackers = None
+        self._attacks_from = None
+        self._attack_codes = None
 
     def _init_board(self):
-        """Создаёт начальное расположение фигур для выбранной игры."""
+        """Создаёт начальное расположение фигур для выбранной игры.
+
+        Returns:
+            bytearray: Коды фигур на 64 клетках, от a8 до h1.
+        """
         if self.game_type == 'chess':
-            return [
-                ['r', 'w', 'a', 'q', 'k', 'a', 'w', 'r'],
-                ['p', 'p', 'p', 'p', 'p', 'p', 'p', 'p'],
-                ['.', '.', '.', '.', '.', '.', '.', '.'],
-                ['.', '.', '.', '.', '.', '.', '.', '.'],
-                ['.', '.', '.', '.', '.', '.', '.', '.'],
-                ['.', '.', '.', '.', '.', '.', '.', '.'],
-                ['P', 'P', 'P', 'P', 'P', 'P', 'P', 'P'],
-                ['R', 'W', 'A', 'Q', 'K', 'A', 'W', 'R']
-            ]
+            layout = ('rwaqkawr'
+                      'pppppppp'
+                      '........'
+                      '........'
+                      '........'
+                      '........'
+                      'PPPPPPPP'
+                      'RWAQKAWR')
+            return bytearray(self.codes[ch] for ch in layout)
         elif self.game_type == 'checkers':
-            board = [['.' for _ in range(8)] for _ in range(8)]
+            squares = bytearray(64)
             for row in range(3):
                 for col in range(8):
                     if (row + col) % 2 == 1:
-                        board[row][col] = 'b'
+                        squares[row * 8 + col] = self.codes['b']
             for row in range(5, 8):
                 for col in range(8):
                     if (row + col) % 2 == 1:
-                        board[row][col] = 'W'
-            return board
+                        squares[row * 8 + col] = self.codes['W']
+            return squares
+
+    @property
+    def board(self):
+        """Снимок доски в виде двумерного списка символов (для совместимости)."""
+        return [[LETTERS[code] for code in self.squares[row * 8:row * 8 + 8]] for row in range(8)]
 
     def print_board(self, highlight=None):
         """Выводит текущее состояние доски с опциональной подсветкой выбранных клеток.
@@ -50,7 +93,7 @@ class Board:
         for i in range(8):
             print(8 - i, end='   ')
             for j in range(8):
-                cell = self.board[i][j]
+                cell = LETTERS[self.squares[i * 8 + j]]
                 if (i, j) in highlight:
                     print(f"\033[46m{cell}\033[0m", end=' ')
                 else:
@@ -69,68 +112,375 @@ class Board:
         Returns:
             tuple: Индексы строки и столбца.
         """
-        col = ord(pos[0].lower()) - ord('a')
-        row = 8 - int(pos[1])
-        return row, col
+        return divmod(square(pos), 8)
+
+    def piece_at(self, pos):
+        """Возвращает символ фигуры на указанной клетке.
+
+        Args:
+            pos (str): Позиция в нотации.
+
+        Returns:
+            str: Символ фигуры или '.' для пустой клетки.
+        """
+        return LETTERS[self.squares[square(pos)]]
+
+    def attack_map(self, color):
+        """Возвращает карту атак стороны для текущей позиции.
+
+        Карта строится при первом запросе, а затем в шахматах обновляется
+        ходами make_move, undo_move и redo_move: пересчитываются только
+        фигуры на изменившихся клетках и дальнобойные фигуры, чьи лучи через них
+        проходят. push и pop, которыми перебирают дерево, карту только
+        сбрасывают, и она строится заново при следующем запросе. В шашках
+        карта строится заново после каждого хода.
+
+        Args:
+            color (str): Атакующая сторона ('white' или 'black').
+
+        Returns:
+            list: Для каждой из 64 клеток — битборд фигур стороны, которые её бьют.
+        """
+        if self._attackers is None:
+            self._build_attack_index()
+        return self._attackers[1 if color == 'black' else 0]
+
+    def _piece_attacks(self, code, sq, occupied_bb):
+        """Возвращает клетки, которые бьёт фигура с кодом code на клетке sq.
+
+        В шахматах это клетки взятия (bitboard.attacks), в шашках — клетки,
+        куда шашка может пойти.
+        """
+        if self.game_type == 'checkers':
+            return MOVE_GENERATORS[code & TYPE_MASK](self, sq, code & BLACK)
+        return attacks(code, sq, occupied_bb)
+
+    def _build_attack_index(self):
+        """Строит карты атак обеих сторон с нуля."""
+        squares = self.squares
+        self._attackers = ([0] * 64, [0] * 64)
+        self._attacks_from = [0] * 64
+        self._attack_codes = bytearray(squares)
+        occupied_bb = occupied(squares)
+        for sq, code in enumerate(squares):
+            if code != EMPTY:
+                targets = self._attacks_from[sq] = self._piece_attacks(code, sq, occupied_bb)
+                attack_map = self._attackers[1 if code & BLACK else 0]
+                bit = 1 << sq
+                for target in bit_squares(targets):
+                    attack_map[target] |= bit
+
+    def _update_attacks(self, changed):
+        """Обновляет карты атак после изменения клеток changed.
+
+        Пересчитываются фигуры на самих клетках и фигуры, которые били эти
+        клетки до хода: только их атаки могут измениться, потому что лучи
+        остальных дальнобойных фигур через изменившиеся клетки не проходят.
+
+        Args:
+            changed (tuple): Индексы клеток, содержимое которых изменилось.
+        """
+        if self._attackers is None:
+            return
+        if self.game_type == 'checkers':
+            self._invalidate_caches()
+            return
+
+        squares = self.squares
+        attack_codes = self._attack_codes
+        attacks_from = self._attacks_from
+        white_map, black_map = self._attackers
+        refresh = 0
+        for sq in changed:
+            refresh |= (1 << sq) | white_map[sq] | black_map[sq]
+
+        occupied_bb = occupied(squares)
+        for sq in bit_squares(refresh):
+            old_code, code = attack_codes[sq], squares[sq]
+            if old_code == code and code & TYPE_MASK not in SLIDERS:
+                continue
+            old = attacks_from[sq]
+            new = attacks(code, sq, occupied_bb) if code != EMPTY else 0
+            if old_code == code and old == new:
+                continue
+            bit = 1 << sq
+            if old:
+                attack_map = black_map if old_code & BLACK else white_map
+                for target in bit_squares(old):
+                    attack_map[target] &= ~bit
+            if new:
+                attack_map = black_map if code & BLACK else white_map
+                for target in bit_squares(new):
+                    attack_map[target] |= bit
+            attacks_from[sq] = new
+            attack_codes[sq] = code
+
+    def _invalidate_caches(self):
+        """Сбрасывает всё, что вычислено для текущей позиции."""
+        self._attackers = None
+        self._attacks_from = None
+        self._attack_codes = None
+
+    def _jumped_square(self, s, e):
+        """Возвращает клетку, через которую мог быть сделан прыжок со взятием.
+
+        Шашка и дамка бьют, вставая сразу за побитой шашкой, поэтому взятая
+        шашка всегда стоит на соседней с конечной клетке по диагонали хода.
+        В шахматах ходы ничего не перепрыгивают.
+
+        Args:
+            s (int): Начальная клетка.
+            e (int): Конечная клетка.
+
+        Returns:
+            int: Индекс клетки или -1, если ход не может быть прыжком.
+        """
+        dr, dc = (e >> 3) - (s >> 3), (e & 7) - (s & 7)
+        if self.game_type != 'checkers' or abs(dr) != abs(dc) or abs(dr) < 2:
+            return -1
+        return e - (dr > 0) * 8 + (dr < 0) * 8 - (dc > 0) + (dc < 0)
+
+    def _put(self, sq, code):
+        """Ставит код на клетку, поддерживая хеш и оценку позиции.
+
+        Args:
+            sq (int): Индекс клетки.
+            code (int): Код фигуры или EMPTY.
+        """
+        old = self.squares[sq]
+        self.hash ^= PIECE_KEYS[old][sq] ^ PIECE_KEYS[code][sq]
+        self.score += SQUARE_SCORES[code][sq] - SQUARE_SCORES[old][sq]
+        self.squares[sq] = code
+
+    def set_position(self, squares, turn):
+        """Ставит на доску произвольную позицию, очищая историю ходов.
+
+        Args:
+            squares (bytes): Коды фигур на 64 клетках.
+            turn (str): Сторона, чей ход ('white' или 'black').
+        """
+        self.squares[:] = squares
+        self.turn = turn
+        self.hash = position_hash(self.squares, turn)
+        self.score = evaluate(self.squares)
+        self.move_history.clear()
+        self.redo_history.clear()
+        del self._hash_deltas[:]
+        del self._score_deltas[:]
+        self._invalidate_caches()
+
+    def to_fen(self):
+        """Записывает позицию строкой в духе FEN.
+
+        Горизонтали перечисляются с восьмой по первую через '/', фигуры
+        обозначаются теми же символами, что и на доске, подряд идущие пустые
+        клетки — цифрой; после пробела указывается сторона, чей ход ('w' или 'b').
+        Тип игры в строку не входит: в шахматах и шашках часть символов совпадает.
+
+        Returns:
+            str: Например, 'rwaqkawr/pppppppp/8/8/8/8/PPPPPPPP/RWAQKAWR w'.
+        """
+        rows = []
+        for row in range(8):
+            text = self.squares[row * 8:row * 8 + 8].translate(_FEN_LETTERS).decode('ascii')
+            rows.append(_EMPTY_RUN.sub(lambda run: str(len(run.group())), text))
+        return f"{'/'.join(rows)} {'b' if self.turn == 'black' else 'w'}"
+
+    def set_fen(self, fen):
+        """Ставит на доску позицию из строки to_fen, очищая историю ходов.
+
+        Args:
+            fen (str): Позиция в формате to_fen.
+
+        Raises:
+            ValueError: Если строка не описывает позицию для этого типа игры.
+        """
+        fields = fen.split()
+        if len(fields) != 2 or fields[1] not in ('w', 'b'):
+            raise ValueError(f"Некорректная позиция: {fen!r}")
+        rows = fields[0].split('/')
+        squares = bytearray()
+        for text in rows:
+            start = len(squares)
+            for ch in text:
+                if ch in '12345678':
+                    squares.extend(bytes(int(ch)))
+                elif ch in self.codes and ch != '.':
+                    squares.append(self.codes[ch])
+                else:
+                    raise ValueError(f"Некорректный символ {ch!r} в позиции {fen!r}")
+            if len(squares) - start != 8:
+                raise ValueError(f"Горизонталь {text!r} не из 8 клеток в позиции {fen!r}")
+        if len(rows) != 8:
+            raise ValueError(f"В позиции {fen!r} не 8 горизонталей")
+        self.set_position(squares, 'black' if fields[1] == 'b' else 'white')
+
+    @classmethod
+    def from_fen(cls, fen, game_type='chess'):
+        """Создаёт доску с позицией из строки to_fen.
+
+        Args:
+            fen (str): Позиция в формате to_fen.
+            game_type (str): Тип игры ('chess' или 'checkers').
+
+        Returns:
+            Board: Новая доска.
+
+        Raises:
+            ValueError: Если строка не описывает позицию для этого типа игры.
+        """
+        board = cls(game_type=game_type)
+        board.set_fen(fen)
+        return board
+
+    def generate_moves(self, color=None, buffer=None):
+        """Генерирует все ходы стороны за один проход по доске.
+
+        Ходы псевдолегальные: в шахматах — как bitboard.generate_moves, в
+        шашках — шаги всех шашек через реестр MOVE_GENERATORS.
+
+        Args:
+            color (str): 'white' или 'black' (по умолчанию — сторона, чей ход).
+            buffer (MoveBuffer): Буфер для ходов; по умолчанию — move_buffer
+                доски, который перезаписывается следующим вызовом.
+
+        Returns:
+            MoveBuffer: Заполненный буфер с ходами, упакованными как в core.pack_move.
+        """
+        if color is None:
+            color = self.turn
+        if buffer is None:
+            buffer = self.move_buffer
+        if self.game_type != 'checkers':
+            buffer.count = generate_moves_into(self.squares, color, buffer.moves)
+            return buffer
+
+        own = BLACK if color == 'black' else 0
+        moves = buffer.moves
+        size = len(moves)
+        count = 0
+        for frm, code in enumerate(self.squares):
+            if code and (code & BLACK) == own:
+                for to in bit_squares(MOVE_GENERATORS[code & TYPE_MASK](self, frm, own)):
+                    if count < size:
+                        moves[count] = frm | to << 6
+                    else:
+                        moves.append(frm | to << 6)
+                        size += 1
+                    count += 1
+        buffer.count = count
+        return buffer
 
     def make_move(self, start, end):
         """Выполняет ход, обновляя доску и историю ходов.
 
+        В шашках после взятия ход не переходит к сопернику, пока та же шашка
+        может бить дальше.
+
         Args:
             start (str): Начальная позиция (например, 'e2').
             end (str): Конечная позиция (например, 'e4').
         """
-        s_row, s_col = self.parse_position(start)
-        e_row, e_col = self.parse_position(end)
-        moving_piece = self.board[s_row][s_col]
-        captured_piece = self.board[e_row][e_col]
-
-        if abs(s_row - e_row) == 2:
-            mid_row = (s_row + e_row) // 2
-            mid_col = (s_col + e_col) // 2
-            captured_piece = self.board[mid_row][mid_col]
-            self.board[mid_row][mid_col] = '.'
-
-        self.move_history.append((start, end, moving_piece, captured_piece))
-        self.board[e_row][e_col] = moving_piece
-        self.board[s_row][s_col] = '.'
         self.redo_history.clear()
-
-        if self.game_type == 'checkers':
-            if (moving_piece == 'W' and e_row == 0) or (moving_piece == 'b' and e_row == 7):
-                self.board[e_row][e_col] = 'K' if moving_piece.isupper() else 'k'
+        move = square(start) | square(end) << 6
+        attackers = self._attackers
+        self.push(move)
+        self._keep_attacks(attackers, move)
 
     def undo_move(self):
         """Отменяет последний совершённый ход."""
         if self.move_history:
-            start, end, piece, captured = self.move_history.pop()
-            s_row, s_col = self.parse_position(start)
-            e_row, e_col = self.parse_position(end)
-
-            if abs(s_row - e_row) == 2:
-                mid_row = (s_row + e_row) // 2
-                mid_col = (s_col + e_col) // 2
-                self.board[mid_row][mid_col] = captured
-
-            self.board[s_row][s_col] = piece
-            self.board[e_row][e_col] = captured
-            self.redo_history.append((start, end, piece, captured))
+            attackers = self._attackers
+            move = self.pop()
+            self._keep_attacks(attackers, move)
+            self.redo_history.append(move)
 
     def redo_move(self):
         """Повторяет последний отменённый ход."""
         if self.redo_history:
-            start, end, piece, captured = self.redo_history.pop()
-            s_row, s_col = self.parse_position(start)
-            e_row, e_col = self.parse_position(end)
+            move = self.redo_history.pop() & 0xFFF
+            attackers = self._attackers
+            self.push(move)
+            self._keep_attacks(attackers, move)
 
-            if abs(s_row - e_row) == 2:
-                mid_row = (s_row + e_row) // 2
-                mid_col = (s_col + e_col) // 2
-                self.board[mid_row][mid_col] = '.'
+    def _keep_attacks(self, attackers, move):
+        """Возвращает карты атак, сброшенные push или pop, и обновляет их после хода.
 
-            self.board[e_row][e_col] = piece
-            self.board[s_row][s_col] = '.'
-            self.move_history.append((start, end, piece, captured))
+        Args:
+            attackers (tuple): Карты атак до хода или None, если их не было.
+            move (int): Сделанный или отменённый ход.
+        """
+        if attackers is not None:
+            self._attackers = attackers
+            self._update_attacks((move & 63, move >> 6 & 63))
+
+    def push(self, move):
+        """Выполняет ход, упакованный как в core.pack_move, без разбора нотации.
+
+        Для pop запоминается всё, что нужно для отмены без вычислений: взятая
+        фигура, её клетка и превращение — в самом упакованном ходе в
+        move_history (см. moves), изменения хеша и оценки — рядом с ним.
+        История отменённых ходов не меняется, поэтому пара push/pop подходит
+        для перебора.
+
+        Args:
+            move (int): Ход (начальная клетка | конечная клетка << 6).
+        """
+        s, e = move & 63, move >> 6 & 63
+        squares = self.squares
+        piece = squares[s]
+        captured = squares[e]
+        old_hash, old_score = self.hash, self.score
+        flags = 0
+        captured_sq = e
+
+        if self.game_type == 'checkers':
+            mid = self._jumped_square(s, e)
+            if mid >= 0 and squares[mid] != EMPTY:
+                captured, captured_sq = squares[mid], mid
+                flags |= JUMP
+                self._put(mid, EMPTY)
+            self._put(e, piece)
+            self._put(s, EMPTY)
+            if (piece == CHECKER and e < 8) or (piece == CHECKER | BLACK and e >= 56):
+                self._put(e, KING_CHECKER | (piece & BLACK))
+                flags |= PROMOTION
+            if captured != EMPTY and can_continue(squares, e):
+                flags |= CONTINUES
+        else:
+            keys = PIECE_KEYS[piece]
+            scores = SQUARE_SCORES[piece]
+            self.hash = old_hash ^ keys[s] ^ keys[e] ^ PIECE_KEYS[captured][e]
+            self.score = old_score + scores[e] - scores[s] - SQUARE_SCORES[captured][e]
+            squares[e] = piece
+            squares[s] = EMPTY
+
+        if not flags & CONTINUES:
+            self.turn = 'black' if self.turn == 'white' else 'white'
+            self.hash ^= BLACK_TO_MOVE
+        self.move_history.append(encode_move(s, e, piece, captured, flags, captured_sq))
+        self._hash_deltas.append(old_hash ^ self.hash)
+        self._score_deltas.append(self.score - old_score)
+        self._attackers = None
+
+    def pop(self):
+        """Отменяет последний ход по записи, сделанной push.
+
+        Returns:
+            int: Отменённый ход в формате moves.encode_move.
+        """
+        move = self.move_history.pop()
+        s, e = move & 63, move >> 6 & 63
+        squares = self.squares
+        squares[e] = EMPTY
+        squares[move >> CAPTURED_SQUARE_SHIFT & 63] = move >> 17 & 31
+        squares[s] = move >> 12 & 31
+        self.hash ^= self._hash_deltas.pop()
+        self.score -= self._score_deltas.pop()
+        if not move & CONTINUES:
+            self.turn = 'black' if self.turn == 'white' else 'white'
+        self._attackers = None
+        return move
 
 
 class Piece:
@@ -146,431 +496,408 @@ class Piece:
         self.color = color
         self.position = position
 
+    @staticmethod
+    def targets(board, sq, own):
+        """Возвращает битборд клеток, куда может пойти фигура. Метод для переопределения.
+
+        Метод не зависит от состояния экземпляра: его вызывают прямо у класса.
+        Методы шашек хранятся в реестре MOVE_GENERATORS; шахматные ходы
+        строит bitboard.
+
+        Args:
+            board (Board): Экземпляр доски.
+            sq (int): Клетка, на которой стоит фигура.
+            own (int): Бит цвета фигуры (0 для белых, BLACK для чёрных).
+
+        Returns:
+            int: Битборд целевых клеток.
+        """
+        return 0
+
     def is_valid_move(self, board, end):
-        """Проверяет корректность хода. Метод для переопределения."""
-        pass
+        """Проверяет корректность хода."""
+        return bool(self.targets(board, square(self.position), self._own()) >> square(end) & 1)
 
     def get_possible_moves(self, board):
-        """Возвращает список допустимых ходов. Метод для переопределения."""
-        pass
+        """Возвращает список допустимых ходов."""
+        return [SQUARE_NAMES[e] for e in bit_squares(self.targets(board, square(self.position), self._own()))]
+
+    def _own(self):
+        """Возвращает бит цвета фигуры (0 для белых, BLACK для чёрных)."""
+        return 0 if self.color == 'white' else BLACK
 
 
 class Checker(Piece):
     """Обычная шашка для игры в шашки."""
 
-    def is_valid_move(self, board, end):
-        s_row, s_col = board.parse_position(self.position)
-        e_row, e_col = board.parse_position(end)
-        direction = -1 if self.color == 'white' else 1
-
-        if abs(s_col - e_col) == 1 and (e_row - s_row) == direction:
-            return board.board[e_row][e_col] == '.'
+    @staticmethod
+    def targets(board, sq, own):
+        squares = board.squares
+        row, col = sq >> 3, sq & 7
+        direction = 1 if own else -1
+        result = 0
 
-        if abs(s_col - e_col) == 2 and (e_row - s_row) == 2 * direction:
-            mid_row = (s_row + e_row) // 2
-            mid_col = (s_col + e_col) // 2
-            return board.board[mid_row][mid_col] != '.' and board.board[e_row][e_col] == '.'
+        for dc in (-1, 1):
+            r, c = row + direction, col + dc
+            if 0 <= r < 8 and 0 <= c < 8 and squares[r * 8 + c] == EMPTY:
+                result |= 1 << (r * 8 + c)
 
-        return False
-
-    def get_possible_moves(self, board):
-        moves = []
-        s_row, s_col = board.parse_position(self.position)
-        direction = -1 if self.color == 'white' else 1
-
-        for dc in [-1, 1]:
-            n_row, n_col = s_row + direction, s_col + dc
-            if 0 <= n_row < 8 and 0 <= n_col < 8 and board.board[n_row][n_col] == '.':
-                moves.append(f"{chr(n_col + ord('a'))}{8 - n_row}")
-
-        for dc in [-2, 2]:
-            n_row, n_col = s_row + 2 * direction, s_col + dc
-            if 0 <= n_row < 8 and 0 <= n_col < 8:
-                mid_row, mid_col = s_row + direction, s_col + dc // 2
-                if (board.board[mid_row][mid_col] != '.' and
-                        board.board[mid_row][mid_col].islower() != (self.color == 'white') and
-                        board.board[n_row][n_col] == '.'):
-                    moves.append(f"{chr(n_col + ord('a'))}{8 - n_row}")
-        return moves
+        for dc in (-2, 2):
+            r, c = row + 2 * direction, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                mid = squares[(row + direction) * 8 + col + dc // 2]
+                if mid != EMPTY and (mid & BLACK) != own and squares[r * 8 + c] == EMPTY:
+                    result |= 1 << (r * 8 + c)
+        return result
 
 
 class KingChecker(Piece):
     """Дамка в шашках."""
 
-    def is_valid_move(self, board, end):
-        s_row, s_col = board.parse_position(self.position)
-        e_row, e_col = board.parse_position(end)
-        if abs(s_row - e_row) != abs(s_col - e_col):
-            return False
-
-        step_row = 1 if e_row > s_row else -1
-        step_col = 1 if e_col > s_col else -1
-        r, c = s_row + step_row, s_col + step_col
-        captured = 0
-        while r != e_row:
-            if board.board[r][c] != '.':
-                if captured or board.board[r][c].islower() == (self.color == 'white'):
-                    return False
-                captured += 1
-            r += step_row
-            c += step_col
-        return board.board[e_row][e_col] == '.' and captured <= 1
-
-    def get_possible_moves(self, board):
-        moves = []
-        s_row, s_col = board.parse_position(self.position)
-        for dr, dc in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-            r, c = s_row + dr, s_col + dc
-            captured = 0
+    @staticmethod
+    def targets(board, sq, own):
+        squares = board.squares
+        row, col = sq >> 3, sq & 7
+        result = 0
+        for dr, dc in ((-1, -1), (-1, 1), (1, -1), (1, 1)):
+            r, c = row + dr, col + dc
             while 0 <= r < 8 and 0 <= c < 8:
-                if board.board[r][c] != '.':
-                    if captured or board.board[r][c].islower() == (self.color == 'white'):
+                target = squares[r * 8 + c]
+                if target != EMPTY:
+                    if (target & BLACK) == own:
                         break
-                    captured += 1
                     r += dr
                     c += dc
-                    if 0 <= r < 8 and 0 <= c < 8 and board.board[r][c] == '.':
-                        moves.append(f"{chr(c + ord('a'))}{8 - r}")
+                    if 0 <= r < 8 and 0 <= c < 8 and squares[r * 8 + c] == EMPTY:
+                        result |= 1 << (r * 8 + c)
                     break
-                moves.append(f"{chr(c + ord('a'))}{8 - r}")
+                result |= 1 << (r * 8 + c)
                 r += dr
                 c += dc
-        return moves
+        return result
 
 
-class Pawn(Piece):
-    """Пешка для шахматной игры."""
+# Шаги шашек по типу фигуры. Шахматные ходы строит bitboard
+# (generate_moves_into, generate_legal_moves и attacks).
+MOVE_GENERATORS = {
+    CHECKER: Checker.targets,
+    KING_CHECKER: KingChecker.targets,
+}
 
-    def is_valid_move(self, board, end):
-        s_row, s_col = board.parse_position(self.position)
-        e_row, e_col = board.parse_position(end)
-        direction = -1 if self.color == 'white' else 1
-
-        if s_col == e_col:
-            if s_row + direction == e_row and board.board[e_row][e_col] == '.':
-                return True
-            if s_row in [1, 6] and s_row + 2 * direction == e_row and board.board[e_row][e_col] == '.' and board.board[s_row + direction][s_col] == '.':
-                return True
-        elif abs(s_col - e_col) == 1 and s_row + direction == e_row:
-            target = board.board[e_row][e_col]
-            if target != '.':
-                if (self.color == 'white' and target.islower()) or (self.color == 'black' and target.isupper()):
-                    return True
-        return False
 
-    def get_possible_moves(self, board):
-        moves = []
-        s_row, s_col = board.parse_position(self.position)
-        direction = -1 if self.color == 'white' else 1
-
-        if 0 <= s_row + direction < 8 and board.board[s_row + direction][s_col] == '.':
-            moves.append(f"{chr(s_col + ord('a'))}{8 - (s_row + direction)}")
-            if s_row in [1, 6] and board.board[s_row + 2 * direction][s_col] == '.':
-                moves.append(f"{chr(s_col + ord('a'))}{8 - (s_row + 2 * direction)}")
-        for dc in [-1, 1]:
-            n_row, n_col = s_row + direction, s_col + dc
-            if 0 <= n_row < 8 and 0 <= n_col < 8:
-                target = board.board[n_row][n_col]
-                if target != '.' and (target.islower() != (self.color == 'white')):
-                    moves.append(f"{chr(n_col + ord('a'))}{8 - n_row}")
-        return moves
-
-
-class Knight(Piece):
-    """Конь в шахматах."""
+MoveResult = namedtuple('MoveResult', 'legal piece captured turn')
+Hint = namedtuple('Hint', 'piece own moves')
+BestMove = namedtuple('BestMove', 'path score depth nodes elapsed pv')
 
-    def is_valid_move(self, board, end):
-        s_row, s_col = board.parse_position(self.position)
-        e_row, e_col = board.parse_position(end)
-        if ((abs(s_row - e_row) == 2 and abs(s_col - e_col) == 1) or
-                (abs(s_row - e_row) == 1 and abs(s_col - e_col) == 2)):
-            target = board.board[e_row][e_col]
-            return target == '.' or (target.islower() != (self.color == 'white'))
-        return False
 
-    def get_possible_moves(self, board):
-        moves = []
-        s_row, s_col = board.parse_position(self.position)
-        for dr in [-2, -1, 1, 2]:
-            for dc in [-2, -1, 1, 2]:
-                if abs(dr) != abs(dc):
-                    n_row, n_col = s_row + dr, s_col + dc
-                    if 0 <= n_row < 8 and 0 <= n_col < 8:
-                        pos = f"{chr(n_col + ord('a'))}{8 - n_row}"
-                        if self.is_valid_move(board, pos):
-                            moves.append(pos)
-        return moves
-
-
-class Bishop(Piece):
-    """Слон в шахматах."""
+class GameSession:
+    """Партия без консоли: все операции возвращают данные и ничего не печатают."""
 
-    def is_valid_move(self, board, end):
-        s_row, s_col = board.parse_position(self.position)
-        e_row, e_col = board.parse_position(end)
-        if abs(s_row - e_row) == abs(s_col - e_col):
-            dr = 1 if e_row > s_row else -1
-            dc = 1 if e_col > s_col else -1
-            r, c = s_row + dr, s_col + dc
-            while (r, c) != (e_row, e_col):
-                if board.board[r][c] != '.':
-                    return False
-                r += dr
-                c += dc
-            target = board.board[e_row][e_col]
-            return target == '.' or (target.islower() != (self.color == 'white'))
-        return False
+    def __init__(self, game_type='chess', cache_size=CACHE_SIZE):
+        """Создаёт партию в начальной позиции.
 
-    def get_possible_moves(self, board):
-        moves = []
-        s_row, s_col = board.parse_position(self.position)
-        for dr, dc in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-            r, c = s_row + dr, s_col + dc
-            while 0 <= r < 8 and 0 <= c < 8:
-                pos = f"{chr(c + ord('a'))}{8 - r}"
-                if board.board[r][c] == '.':
-                    moves.append(pos)
-                else:
-                    if board.board[r][c].islower() != (self.color == 'white'):
-                        moves.append(pos)
-                    break
-                r += dr
-                c += dc
-        return moves
+        Args:
+            game_type (str): Тип игры ('chess' или 'checkers').
+            cache_size (int): Размер кэша ходов и угроз (см. poscache); 0 отключает кэш.
+        """
+        self.board = Board(game_type=game_type)
+        self.move_count = 0
+        self.cache = PositionCache(cache_size)
+        self._engine = None
 
+    @property
+    def game_type(self):
+        """Тип игры: 'chess' или 'checkers'."""
+        return self.board.game_type
 
-class Rook(Piece):
-    """Ладья в шахматах."""
+    @property
+    def turn(self):
+        """Сторона, чей ход."""
+        return self.board.turn
 
-    def is_valid_move(self, board, end):
-        s_row, s_col = board.parse_position(self.position)
-        e_row, e_col = board.parse_position(end)
-        if s_row == e_row:
-            for col in range(min(s_col, e_col) + 1, max(s_col, e_col)):
-                if board.board[s_row][col] != '.':
-                    return False
-            target = board.board[e_row][e_col]
-            return target == '.' or (target.islower() != (self.color == 'white'))
-        elif s_col == e_col:
-            for row in range(min(s_row, e_row) + 1, max(s_row, e_row)):
-                if board.board[row][s_col] != '.':
-                    return False
-            target = board.board[e_row][e_col]
-            return target == '.' or (target.islower() != (self.color == 'white'))
-        return False
+    def _own(self, code):
+        """Проверяет, принадлежит ли фигура с кодом code стороне, чей ход."""
+        return code != EMPTY and (code & BLACK) == (BLACK if self.turn == 'black' else 0)
 
-    def get_possible_moves(self, board):
-        moves = []
-        s_row, s_col = board.parse_position(self.position)
-        for row in range(8):
-            if row != s_row:
-                pos = f"{chr(s_col + ord('a'))}{8 - row}"
-                if self.is_valid_move(board, pos):
-                    moves.append(pos)
-        for col in range(8):
-            if col != s_col:
-                pos = f"{chr(col + ord('a'))}{8 - s_row}"
-                if self.is_valid_move(board, pos):
-                    moves.append(pos)
-        return moves
+    def _legal_steps(self):
+        """Возвращает первые шаги всех допустимых ходов в шашках с учётом обязательного взятия.
 
+        Returns:
+            dict: Отображение начальной клетки в список клеток, куда можно пойти.
+        """
+        steps = {}
+        for path, _ in legal_moves(self.board):
+            frm, to = SQ64[path[0]], SQ64[path[1]]
+            if to not in steps.setdefault(frm, []):
+                steps[frm].append(to)
+        return steps
+
+    def _cached(self, kind, sq, compute):
+        """Возвращает ответ на запрос kind о клетке (или стороне) sq из кэша позиции.
+
+        В шашках в ключ входит и клетка шашки, продолжающей серию взятий:
+        от неё зависят допустимые ходы при той же расстановке.
+        """
+        board = self.board
+        start = continuation_square(board) if board.game_type == 'checkers' else None
+        return self.cache.lookup((board.hash, start, kind, sq), compute)
 
-class Queen(Piece):
-    """Ферзь в шахматах."""
+    def _legal_moves(self, color):
+        """Возвращает ходы стороны в шахматах, не оставляющие её короля под боем.
 
-    def is_valid_move(self, board, end):
-        s_row, s_col = board.parse_position(self.position)
-        e_row, e_col = board.parse_position(end)
-        if (s_row == e_row or s_col == e_col or abs(s_row - e_row) == abs(s_col - e_col)):
-            return Rook.is_valid_move(self, board, end) or Bishop.is_valid_move(self, board, end)
-        return False
+        Returns:
+            dict: Отображение начальной клетки в список клеток, куда можно пойти.
+        """
+        def compute():
+            steps = {}
+            for move in generate_legal_moves(self.board.squares, color):
+                steps.setdefault(move & 63, []).append(move >> 6)
+            return steps
 
-    def get_possible_moves(self, board):
-        moves = []
-        s_row, s_col = board.parse_position(self.position)
-        for row in range(8):
-            if row != s_row:
-                pos = f"{chr(s_col + ord('a'))}{8 - row}"
-                if self.is_valid_move(board, pos):
-                    moves.append(pos)
-        for col in range(8):
-            if col != s_col:
-                pos = f"{chr(col + ord('a'))}{8 - s_row}"
-                if self.is_valid_move(board, pos):
-                    moves.append(pos)
-        for dr, dc in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-            r, c = s_row + dr, s_col + dc
-            while 0 <= r < 8 and 0 <= c < 8:
-                pos = f"{chr(c + ord('a'))}{8 - r}"
-                if self.is_valid_move(board, pos):
-                    moves.append(pos)
-                r += dr
-                c += dc
-        return moves
+        return self._cached('legal', color, compute)
 
+    def _targets(self, sq):
+        """Возвращает клетки, куда может пойти фигура стороны, чей ход, с клетки sq."""
+        if self.game_type == 'checkers':
+            return self._cached('moves', sq, lambda: tuple(self._legal_steps().get(sq, ())))
+        return self._legal_moves(self.turn).get(sq, ())
 
-class King(Piece):
-    """Король в шахматах."""
+    def is_valid_move(self, start, end):
+        """Проверяет корректность хода.
 
-    def is_valid_move(self, board, end):
-        s_row, s_col = board.parse_position(self.position)
-        e_row, e_col = board.parse_position(end)
-        if abs(s_row - e_row) <= 1 and abs(s_col - e_col) <= 1:
-            target = board.board[e_row][e_col]
-            return target == '.' or (target.islower() != (self.color == 'white'))
-        return False
+        Проверяется очередь хода; в шахматах также правило хода фигуры и то,
+        что после хода свой король не окажется под боем, в шашках —
+        обязательное взятие.
 
-    def get_possible_moves(self, board):
-        moves = []
-        s_row, s_col = board.parse_position(self.position)
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:
-                    continue
-                n_row, n_col = s_row + dr, s_col + dc
-                if 0 <= n_row < 8 and 0 <= n_col < 8:
-                    pos = f"{chr(n_col + ord('a'))}{8 - n_row}"
-                    if self.is_valid_move(board, pos):
-                        moves.append(pos)
-        return moves
+        Args:
+            start (str): Начальная позиция.
+            end (str): Конечная позиция.
 
+        Returns:
+            bool: True, если ход допустим, иначе False.
 
-class Wizard(Piece):
-    """Волшебник, комбинирующий ходы коня и короля."""
+        Raises:
+            ValueError: Если позиция не является клеткой доски.
+        """
+        s, e = square(start), square(end)
+        return self._own(self.board.squares[s]) and e in self._targets(s)
 
-    def is_valid_move(self, board, end):
-        s_row, s_col = board.parse_position(self.position)
-        e_row, e_col = board.parse_position(end)
-        if ((abs(s_row - e_row) == 2 and abs(s_col - e_col) == 1) or
-                (abs(s_row - e_row) == 1 and abs(s_col - e_col) == 2)):
-            target = board.board[e_row][e_col]
-            return target == '.' or (target.islower() != (self.color == 'white'))
-        if abs(s_row - e_row) <= 1 and abs(s_col - e_col) <= 1:
-            target = board.board[e_row][e_col]
-            return target == '.' or (target.islower() != (self.color == 'white'))
-        return False
+    def is_check(self):
+        """Проверяет, под шахом ли король стороны, чей ход (в шашках всегда False)."""
+        if self.game_type != 'chess':
+            return False
+        turn = self.turn
+        return bool(self._cached('checkers', turn, lambda: checks_and_pins(self.board.squares, turn)[1]))
 
-    def get_possible_moves(self, board):
-        moves = []
-        s_row, s_col = board.parse_position(self.position)
-        for dr in [-2, -1, 1, 2]:
-            for dc in [-2, -1, 1, 2]:
-                if abs(dr) != abs(dc):
-                    n_row, n_col = s_row + dr, s_col + dc
-                    pos = f"{chr(n_col + ord('a'))}{8 - n_row}"
-                    if 0 <= n_row < 8 and 0 <= n_col < 8 and self.is_valid_move(board, pos):
-                        moves.append(pos)
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:
-                    continue
-                n_row, n_col = s_row + dr, s_col + dc
-                pos = f"{chr(n_col + ord('a'))}{8 - n_row}"
-                if 0 <= n_row < 8 and 0 <= n_col < 8 and self.is_valid_move(board, pos):
-                    moves.append(pos)
-        return moves
+    def is_checkmate(self):
+        """Проверяет, получила ли сторона, чей ход, мат (в шашках всегда False)."""
+        return self.is_check() and not self._legal_moves(self.turn)
 
+    def is_stalemate(self):
+        """Проверяет, пат ли у стороны, чей ход (в шашках всегда False)."""
+        return self.game_type == 'chess' and not self.is_check() and not self._legal_moves(self.turn)
 
-class Dragon(Piece):
-    """Дракон: сочетает возможности ладьи и коня."""
+    def make_move(self, start, end):
+        """Делает ход, если он допустим.
 
-    def is_valid_move(self, board, end):
-        s_row, s_col = board.parse_position(self.position)
-        e_row, e_col = board.parse_position(end)
-        if s_row == e_row or s_col == e_col:
-            return Rook.is_valid_move(self, board, end)
-        if ((abs(s_row - e_row) == 2 and abs(s_col - e_col) == 1) or
-                (abs(s_row - e_row) == 1 and abs(s_col - e_col) == 2)):
-            target = board.board[e_row][e_col]
-            return target == '.' or (target.islower() != (self.color == 'white'))
-        return False
+        Args:
+            start (str): Начальная позиция.
+            end (str): Конечная позиция.
 
-    def get_possible_moves(self, board):
-        moves = []
-        s_row, s_col = board.parse_position(self.position)
-        for row in range(8):
-            if row != s_row:
-                pos = f"{chr(s_col + ord('a'))}{8 - row}"
-                if self.is_valid_move(board, pos):
-                    moves.append(pos)
-        for col in range(8):
-            if col != s_col:
-                pos = f"{chr(col + ord('a'))}{8 - s_row}"
-                if self.is_valid_move(board, pos):
-                    moves.append(pos)
-        for dr in [-2, -1, 1, 2]:
-            for dc in [-2, -1, 1, 2]:
-                if abs(dr) != abs(dc):
-                    n_row, n_col = s_row + dr, s_col + dc
-                    pos = f"{chr(n_col + ord('a'))}{8 - n_row}"
-                    if 0 <= n_row < 8 and 0 <= n_col < 8 and self.is_valid_move(board, pos):
-                        moves.append(pos)
-        return moves
-
-
-class Archer(Piece):
-    """Стрелок, способный двигаться как слон или совершать 'выстрел' на две клетки по диагонали."""
+        Returns:
+            MoveResult: Допустим ли ход, символы сходившей и взятой фигуры и
+            сторона, чей ход после него.
 
-    def is_valid_move(self, board, end):
-        s_row, s_col = board.parse_position(self.position)
-        e_row, e_col = board.parse_position(end)
-        if abs(s_row - e_row) == abs(s_col - e_col):
-            return Bishop.is_valid_move(self, board, end)
-        if abs(s_row - e_row) == 2 and abs(s_col - e_col) == 2:
-            target = board.board[e_row][e_col]
-            return target != '.' and (target.islower() != (self.color == 'white'))
-        return False
+        Raises:
+            ValueError: Если позиция не является клеткой доски.
+        """
+        if not self.is_valid_move(start, end):
+            return MoveResult(False, self.board.piece_at(start), '.', self.turn)
+        self.board.make_move(start, end)
+        self.move_count += 1
+        _, _, piece, captured = decode_move(self.board.move_history[-1])
+        return MoveResult(True, piece, captured, self.turn)
 
-    def get_possible_moves(self, board):
-        moves = []
-        s_row, s_col = board.parse_position(self.position)
-        for dr, dc in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-            r, c = s_row + dr, s_col + dc
-            while 0 <= r < 8 and 0 <= c < 8:
-                pos = f"{chr(c + ord('a'))}{8 - r}"
-                if self.is_valid_move(board, pos):
-                    moves.append(pos)
-                r += dr
-                c += dc
-        for dr, dc in [(-2, -2), (-2, 2), (2, -2), (2, 2)]:
-            r, c = s_row + dr, s_col + dc
-            pos = f"{chr(c + ord('a'))}{8 - r}"
-            if 0 <= r < 8 and 0 <= c < 8 and self.is_valid_move(board, pos):
-                moves.append(pos)
-        return moves
+    def undo(self):
+        """Отменяет последний ход.
+
+        Returns:
+            bool: False, если отменять нечего.
+        """
+        if not self.board.move_history:
+            return False
+        self.board.undo_move()
+        self.move_count -= 1
+        return True
+
+    def redo(self):
+        """Повторяет последний отменённый ход.
+
+        Returns:
+            bool: False, если повторять нечего.
+        """
+        if not self.board.redo_history:
+            return False
+        self.board.redo_move()
+        self.move_count += 1
+        return True
+
+    def hint(self, pos):
+        """Возвращает ходы фигуры на указанной клетке.
+
+        Args:
+            pos (str): Позиция фигуры (например, 'e2').
+
+        Returns:
+            Hint: Символ фигуры ('.' для пустой клетки), принадлежит ли она
+            стороне, чей ход, и клетки, куда она может пойти (пустой список
+            для чужой фигуры).
+
+        Raises:
+            ValueError: Если позиция не является клеткой доски.
+        """
+        sq = square(pos)
+        code = self.board.squares[sq]
+        if not self._own(code):
+            return Hint(LETTERS[code], False, [])
+        return Hint(LETTERS[code], True, [SQUARE_NAMES[target] for target in self._targets(sq)])
+
+    def threats(self, pos):
+        """Возвращает фигуры противника, которые атакуют указанную клетку.
+
+        Противником считается сторона, противоположная фигуре на клетке;
+        для пустой клетки — чёрные.
+
+        Args:
+            pos (str): Позиция клетки.
+
+        Returns:
+            list: Пары (клетка, символ фигуры) атакующих фигур.
+
+        Raises:
+            ValueError: Если позиция не является клеткой доски.
+        """
+        target = square(pos)
+        return list(self._cached('threats', target, lambda: self._threats(target)))
+
+    def _threats(self, target):
+        """Вычисляет угрозы клетке target (см. threats)."""
+        squares = self.board.squares
+        enemy = 'white' if squares[target] & BLACK else 'black'
+        return tuple((SQUARE_NAMES[sq], LETTERS[squares[sq]])
+                     for sq in bit_squares(self.board.attack_map(enemy)[target]))
+
+    def best_move(self, movetime=1.0, depth=None, workers=1):
+        """Ищет лучший ход для стороны, чей ход.
+
+        Args:
+            movetime (float): Время на поиск в секундах.
+            depth (int): Максимальная глубина.
+            workers (int): Число процессов для шахматного поиска.
+
+        Returns:
+            BestMove: Путь хода в нотации (пустой, если ходов нет; в шашках —
+            вся серия взятий), оценка, глубина, число узлов, время и главный
+            вариант.
+        """
+        if self.game_type == 'checkers':
+            if self._engine is None:
+                self._engine = CheckersEngine()
+            result = self._engine.search(self.board, depth, movetime)
+            return BestMove(result.move, result.score, result.depth, result.nodes, result.elapsed, result.pv)
+        if workers > 1:
+            result = parallel_search(self.board, depth, movetime, workers)
+        else:
+            if self._engine is None:
+                self._engine = Engine()
+            result = self._engine.search(self.board, depth, movetime)
+        path = move_names(result.move) if result.move else ()
+        return BestMove(path, result.score, result.depth, result.nodes, result.elapsed, result.pv)
+
+    def save(self, filename):
+        """Сохраняет историю ходов в файл, по ходу на строку.
+
+        Args:
+            filename (str): Имя файла для сохранения.
+        """
+        with open(filename, 'w') as f:
+            for start, end, piece, captured in self.board.move_history.notation:
+                f.write(f"{piece}{start}{end}\n")
+
+    def load(self, filename):
+        """Загружает партию из файла, воспроизводя и проверяя все ходы.
+
+        Партия начинается с новой доски того же типа игры, если в файле не
+        указан другой (см. archive).
+
+        Args:
+            filename (str): Имя файла для загрузки.
+
+        Raises:
+            ValueError: Если в партии есть недопустимый ход.
+        """
+        game = next(iter_games(filename, self.game_type), None)
+        board = Board(game_type=game.variant if game else self.game_type)
+        if game:
+            for board in replay(game):
+                pass
+        self.board = board
+        self.move_count = len(board.move_history)
+        self.cache.clear()
+        self._engine = None
 
 
 class Game:
-    """Класс, управляющий процессом шахматной игры."""
+    """Консольная шахматная партия: ввод команд и вывод поверх GameSession."""
 
-    def __init__(self):
-        self.board = Board()
-        self.turn = 'white'
-        self.move_count = 0
+    game_type = 'chess'
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.session = GameSession(self.game_type, cache_size)
+        self.workers = 1
+
+    @property
+    def board(self):
+        """Доска текущей партии."""
+        return self.session.board
+
+    @property
+    def turn(self):
+        """Сторона, чей ход; хранится в доске и меняется вместе с ходами."""
+        return self.session.turn
+
+    @property
+    def move_count(self):
+        """Число сделанных ходов."""
+        return self.session.move_count
 
     def play(self):
         """Основной цикл игры."""
         while True:
             self.board.print_board()
-            print(f"Ход {'белых' if self.turn == 'white' else 'черных'}. Введите ход (например, e2 e4) или команду (back, next, hint, threats, save, load, exit):")
+            print(f"Ход {'белых' if self.turn == 'white' else 'черных'}. Введите ход (например, e2 e4) или команду (back, next, hint, threats, bestmove, save, load, exit):")
             user_input = input().strip().lower()
 
             if user_input == 'exit':
                 break
             elif user_input == 'back':
-                self.board.undo_move()
-                self.move_count -= 1
-                self.turn = 'black' if self.turn == 'white' else 'white'
+                self.session.undo()
             elif user_input == 'next':
-                self.board.redo_move()
-                self.move_count += 1
-                self.turn = 'black' if self.turn == 'white' else 'white'
+                self.session.redo()
             elif user_input.startswith('hint'):
                 pos = user_input.split()[1]
                 self.hint(pos)
             elif user_input.startswith('threats'):
                 pos = user_input.split()[1]
                 self.threats(pos)
+            elif user_input.startswith('bestmove'):
+                args = user_input.split()
+                try:
+                    movetime = float(args[1]) if len(args) > 1 else 1.0
+                except ValueError:
+                    print("Неверный формат ввода. Повторите попытку.")
+                    continue
+                self.bestmove(movetime)
             elif user_input.startswith('save'):
                 filename = user_input.split()[1]
                 self.save_game(filename)
@@ -580,17 +907,19 @@ class Game:
             else:
                 try:
                     start, end = user_input.split()
-                    if self.is_valid_move(start, end):
-                        self.board.make_move(start, end)
-                        self.move_count += 1
-                        self.turn = 'black' if self.turn == 'white' else 'white'
-                    else:
+                    if not self.make_move(start, end):
                         print("Неверный ход. Повторите попытку.")
+                    elif self.is_checkmate():
+                        print(f"Мат! Победили {'черные' if self.turn == 'white' else 'белые'}.")
+                    elif self.is_stalemate():
+                        print("Пат.")
+                    elif self.is_check():
+                        print("Шах!")
                 except ValueError:
                     print("Неверный формат ввода. Повторите попытку.")
 
     def is_valid_move(self, start, end):
-        """Проверяет корректность хода на основе типа фигуры.
+        """Проверяет корректность хода.
 
         Args:
             start (str): Начальная позиция.
@@ -599,31 +928,31 @@ class Game:
         Returns:
             bool: True, если ход допустим, иначе False.
         """
-        s_row, s_col = self.board.parse_position(start)
-        piece = self.board.board[s_row][s_col]
+        return self.session.is_valid_move(start, end)
 
-        if piece == '.':
-            return False
+    def is_check(self):
+        """Проверяет, под шахом ли король стороны, чей ход."""
+        return self.session.is_check()
+
+    def is_checkmate(self):
+        """Проверяет, получила ли сторона, чей ход, мат."""
+        return self.session.is_checkmate()
+
+    def is_stalemate(self):
+        """Проверяет, пат ли у стороны, чей ход."""
+        return self.session.is_stalemate()
 
-        if piece.lower() == 'p':
-            return Pawn('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'h':
-            return Knight('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'r':
-            return Rook('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'b':
-            return Bishop('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'q':
-            return Queen('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'k':
-            return King('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'w':
-            return Wizard('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'd':
-            return Dragon('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        elif piece.lower() == 'a':
-            return Archer('white' if piece.isupper() else 'black', start).is_valid_move(self.board, end)
-        return False
+    def make_move(self, start, end):
+        """Делает ход, если он допустим.
+
+        Args:
+            start (str): Начальная позиция.
+            end (str): Конечная позиция.
+
+        Returns:
+            bool: True, если ход сделан.
+        """
+        return self.session.make_move(start, end).legal
 
     def hint(self, pos):
         """Выводит все возможные ходы для фигуры на указанной позиции.
@@ -631,85 +960,54 @@ class Game:
         Args:
             pos (str): Позиция фигуры (например, 'e2').
         """
-        row, col = self.board.parse_position(pos)
-        piece = self.board.board[row][col]
+        hint = self.session.hint(pos)
 
-        if piece == '.':
+        if hint.piece == '.':
             print("На этой клетке нет фигуры.")
             return
 
-        if (self.turn == 'white' and piece.islower()) or (self.turn == 'black' and piece.isupper()):
+        if not hint.own:
             print("Нельзя получить подсказку для фигуры противника.")
             return
 
-        moves = []
-        if piece.lower() == 'p':
-            moves = Pawn('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'h':
-            moves = Knight('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'r':
-            moves = Rook('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'b':
-            moves = Bishop('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'q':
-            moves = Queen('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'k':
-            moves = King('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'w':
-            moves = Wizard('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'd':
-            moves = Dragon('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-        elif piece.lower() == 'a':
-            moves = Archer('white' if piece.isupper() else 'black', pos).get_possible_moves(self.board)
-
-        if moves:
-            print(f"Возможные ходы для фигуры на {pos}: {', '.join(moves)}")
-            hl = [self.board.parse_position(mv) for mv in moves]
+        if hint.moves:
+            print(f"Возможные ходы для фигуры на {pos}: {', '.join(hint.moves)}")
+            hl = [self.board.parse_position(mv) for mv in hint.moves]
             self.board.print_board(hl)
         else:
             print(f"Нет возможных ходов для фигуры на {pos}.")
 
+    def bestmove(self, movetime=1.0):
+        """Ищет и выводит лучший ход для стороны, чей ход.
+
+        Args:
+            movetime (float): Время на поиск в секундах.
+
+        Returns:
+            tuple: Клетки хода в нотации или None, если ходов нет.
+        """
+        result = self.session.best_move(movetime, workers=self.workers)
+        if not result.path:
+            print("Ходов нет.")
+            return None
+        pv = ' '.join('-'.join(path) for path in result.pv)
+        print(f"Лучший ход: {' '.join(result.path)} (оценка {format_score(result.score)}, глубина {result.depth}, "
+              f"{result.nodes} узлов за {result.elapsed:.2f} с; вариант {pv})")
+        return result.path
+
     def threats(self, pos):
         """Отображает фигуры, которые угрожают указанной клетке.
 
         Args:
             pos (str): Позиция клетки (например, 'e4').
         """
-        row, col = self.board.parse_position(pos)
-        threats_list = []
+        threats_list = self.session.threats(pos)
 
-        for i in range(8):
-            for j in range(8):
-                piece = self.board.board[i][j]
-                if piece != '.' and (piece.islower() != self.board.board[row][col].islower()):
-                    if piece.lower() == 'p':
-                        moves = Pawn('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'h':
-                        moves = Knight('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'r':
-                        moves = Rook('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'b':
-                        moves = Bishop('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'q':
-                        moves = Queen('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'k':
-                        moves = King('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'w':
-                        moves = Wizard('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'd':
-                        moves = Dragon('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-                    elif piece.lower() == 'a':
-                        moves = Archer('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}").get_possible_moves(self.board)
-
-                    for mv in moves:
-                        if self.board.parse_position(mv) == (row, col):
-                            threats_list.append((i, j))
-
-        self.board.print_board(threats_list)
+        self.board.print_board([self.board.parse_position(name) for name, _ in threats_list])
         if threats_list:
             print(f"Фигура на {pos} под угрозой следующих фигур:")
-            for i, j in threats_list:
-                print(f"{self.board.board[i][j]} на {chr(j + ord('a'))}{8 - i}")
+            for name, piece in threats_list:
+                print(f"{piece} на {name}")
         else:
             print(f"Фигура на {pos} не находится под угрозой.")
 
@@ -719,15 +1017,7 @@ class Game:
         Args:
             filename (str): Имя файла для сохранения.
         """
-        with open(filename, 'w') as f:
-            for move in self.board.move_history:
-                start, end, piece, captured = move
-                s_row, s_col = self.board.parse_position(start)
-                e_row, e_col = self.board.parse_position(end)
-                start_notation = f"{chr(s_col + ord('a'))}{8 - s_row}"
-                end_notation = f"{chr(e_col + ord('a'))}{8 - e_row}"
-                full_move = f"{piece}{start_notation}{end_notation}"
-                f.write(f"{full_move}\n")
+        self.session.save(filename)
         print(f"Партия сохранена в файл {filename}")
 
     def load_game(self, filename):
@@ -736,117 +1026,117 @@ class Game:
         Args:
             filename (str): Имя файла для загрузки.
         """
-        self.board = Board()
-        self.turn = 'white'
-        self.move_count = 0
-
-        with open(filename, 'r') as f:
-            for line in f:
-                move = line.strip()
-                piece = move[0]
-                start_pos = move[1:3]
-                end_pos = move[3:5]
-                self.board.make_move(start_pos, end_pos)
+        try:
+            self.session.load(filename)
+        except ValueError as error:
+            print(f"Не удалось загрузить партию: {error}")
+            return
         print(f"Партия загружена из файла {filename}")
 
 
 class CheckersGame(Game):
     """Класс для управления игрой в шашки."""
 
-    def __init__(self):
-        self.board = Board(game_type='checkers')
-        self.turn = 'white'
-        self.move_count = 0
-
-    def is_valid_move(self, start, end):
-        s_row, s_col = self.board.parse_position(start)
-        piece = self.board.board[s_row][s_col]
-        if piece == '.' or (self.turn == 'white' and piece.islower()) or (self.turn == 'black' and piece.isupper()):
-            return False
-
-        checker = Checker('white' if piece.isupper() else 'black', start) if piece in 'Wb' else KingChecker('white' if piece.isupper() else 'black', start)
-        return checker.is_valid_move(self.board, end)
-
-    def make_move(self, start, end):
-        print(f"\n=== Попытка хода {start} -> {end} ===")
-        s_row, s_col = self.board.parse_position(start)
-        e_row, e_col = self.board.parse_position(end)
-        piece = self.board.board[s_row][s_col]
-        print(f"Фигура: {piece}, цвет: {'белый' if piece.isupper() else 'черный'}")
-
-        if abs(s_row - e_row) == 2:
-            mid_row = (s_row + e_row) // 2
-            mid_col = (s_col + e_col) // 2
-            print(f"Удаляем шашку на {chr(mid_col + ord('a'))}{8 - mid_row}")
-            self.board.board[mid_row][mid_col] = '.'
-
-        if abs(s_row - e_row) == 2:
-            mid_row = (s_row + e_row) // 2
-            mid_col = (s_col + e_col) // 2
-            captured = self.board.board[mid_row][mid_col]
-            self.board.board[mid_row][mid_col] = '.'
-            self.board.move_history.append((start, end, piece, captured))
-        else:
-            self.board.move_history.append((start, end, piece, None))
-
-        self.board.board[s_row][s_col] = '.'
-        self.board.board[e_row][e_col] = piece
-
-        if (piece == 'W' and e_row == 0) or (piece == 'b' and e_row == 7):
-            self.board.board[e_row][e_col] = piece.upper() if self.turn == 'white' else piece.lower()
-
-        self.turn = 'black' if self.turn == 'white' else 'white'
+    game_type = 'checkers'
 
     def hint(self, pos):
-        row, col = self.board.parse_position(pos)
-        piece = self.board.board[row][col]
+        hint = self.session.hint(pos)
 
-        if piece == '.':
+        if hint.piece == '.':
             print("На этой клетке нет шашки.")
             return
-        if (self.turn == 'white' and piece.islower()) or (self.turn == 'black' and piece.isupper()):
+        if not hint.own:
             print("Подсказка для шашки противника недоступна.")
             return
 
-        checker = Checker('white' if piece.isupper() else 'black', pos) if piece in 'Wb' else KingChecker('white' if piece.isupper() else 'black', pos)
-        moves = checker.get_possible_moves(self.board)
-
-        if moves:
-            print(f"Возможные ходы для шашки на {pos}: {', '.join(moves)}")
-            hl = [self.board.parse_position(mv) for mv in moves]
+        if hint.moves:
+            print(f"Возможные ходы для шашки на {pos}: {', '.join(hint.moves)}")
+            hl = [self.board.parse_position(mv) for mv in hint.moves]
             self.board.print_board(hl)
         else:
             print(f"Нет возможных ходов для шашки на {pos}.")
 
     def threats(self, pos):
-        row, col = self.board.parse_position(pos)
-        threats_list = []
-        for i in range(8):
-            for j in range(8):
-                piece = self.board.board[i][j]
-                if piece != '.' and (piece.islower() != self.board.board[row][col].islower()):
-                    checker = Checker('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}") if piece in 'Wb' else KingChecker('white' if piece.isupper() else 'black', f"{chr(j + ord('a'))}{8 - i}")
-                    moves = checker.get_possible_moves(self.board)
-                    if pos in moves:
-                        threats_list.append((i, j))
-
-        self.board.print_board(threats_list)
+        threats_list = self.session.threats(pos)
+
+        self.board.print_board([self.board.parse_position(name) for name, _ in threats_list])
         if threats_list:
             print(f"Клетка {pos} под угрозой следующих шашек:")
-            for i, j in threats_list:
-                print(f"{self.board.board[i][j]} на {chr(j + ord('a'))}{8 - i}")
+            for name, piece in threats_list:
+                print(f"{piece} на {name}")
         else:
             print(f"Клетка {pos} не находится под угрозой.")
 
 
-if __name__ == "__main__":
+def main(argv=None):
+    """Точка входа: интерактивная игра или служебная команда.
+
+    Args:
+        argv (list): Аргументы командной строки (по умолчанию sys.argv[1:]).
+
+    Returns:
+        int: Код завершения.
+    """
+    parser = argparse.ArgumentParser(description="Шахматы с волшебником, драконом и стрелком, а также шашки.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="число процессов для поиска лучшего хода в шахматах (Lazy SMP)")
+    parser.add_argument('--cache', type=int, default=CACHE_SIZE,
+                        help="число позиций в кэше подсказок и угроз (0 — без кэша)")
+    commands = parser.add_subparsers(dest='command')
+
+    perft_parser = commands.add_parser('perft', help="подсчёт листьев дерева ходов и скорости генерации")
+    perft_parser.add_argument('--depth', type=int, default=3, help="глубина в полуходах")
+    perft_parser.add_argument('--variant', choices=['chess', 'checkers'], default='chess', help="тип игры")
+    perft_parser.add_argument('--game', help="файл партии (формат save или архив — берётся первая партия), позиция после которой считается")
+    perft_parser.add_argument('--fen', help="позиция в формате Board.to_fen, от которой считается (вместо --game)")
+    perft_parser.add_argument('--check', action='store_true', help="сверить эталонные позиции до глубины --depth")
+    perft_parser.add_argument('--legal', action='store_true', help="считать только ходы без шаха своему королю")
+    perft_parser.add_argument('--tt', type=float, default=0, help="размер таблицы транспозиций в МБ (0 — без таблицы)")
+
+    bench_parser = commands.add_parser('evalbench', help="сравнение полной и инкрементальной оценки позиции")
+    bench_parser.add_argument('--depth', type=int, default=3, help="глубина обхода в полуходах")
+    bench_parser.add_argument('--variant', choices=['chess', 'checkers'], default='chess', help="тип игры")
+    bench_parser.add_argument('--game', help="файл партии (формат save или архив — берётся первая партия), от позиции после которой идёт обход")
+    bench_parser.add_argument('--fen', help="позиция в формате Board.to_fen, от которой идёт обход (вместо --game)")
+
+    analyze_parser = commands.add_parser('analyze', help="пакетный анализ позиций сохранённых партий")
+    analyze_parser.add_argument('files', nargs='+', help="файлы партий (формат save)")
+    analyze_parser.add_argument('--jobs', type=int, default=None, help="число процессов (по умолчанию — по числу ядер)")
+    analyze_parser.add_argument('--variant', choices=['chess', 'checkers'], default='chess', help="тип игры")
+
+    convert_parser = commands.add_parser('convert', help="перевод архива партий между текстовым и двоичным форматом")
+    convert_parser.add_argument('src', help="исходный файл: текстовый архив (или файл save) либо двоичный архив")
+    convert_parser.add_argument('dst', help="файл результата в другом формате")
+    convert_parser.add_argument('--variant', choices=['chess', 'checkers'], default='chess',
+                                help="тип игры для партии без строки-разделителя")
+
+    args = parser.parse_args(argv)
+    if args.command == 'perft':
+        import perft
+        return perft.run(args)
+    if args.command == 'evalbench':
+        import evaluation
+        return evaluation.run(args)
+    if args.command == 'analyze':
+        import analysis
+        return analysis.run(args)
+    if args.command == 'convert':
+        import binarchive
+        return binarchive.run(args)
+
     print("Выберите игру: 1 - Шахматы, 2 - Шашки")
     choice = input().strip()
     if choice == '1':
-        game = Game()
+        game = Game(args.cache)
     elif choice == '2':
-        game = CheckersGame()
+        game = CheckersGame(args.cache)
     else:
         print("Неверный выбор, по умолчанию запускаются шахматы.")
-        game = Game()
+        game = Game(args.cache)
+    game.workers = args.workers
     game.play()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Компактное целочисленное представление доски.
+
+Клетка кодируется одним числом ``sq = строка * 8 + столбец`` (строка 0 — восьмая
+горизонталь, как в ``Board.print_board``), фигура — небольшим целым кодом:
+младшие четыре бита задают тип фигуры, бит ``BLACK`` — чёрный цвет.
+Пустая клетка имеет код ``EMPTY``.
+"""
+
+EMPTY = 0
+
+PAWN = 1
+KNIGHT = 2
+BISHOP = 3
+ROOK = 4
+QUEEN = 5
+KING = 6
+WIZARD = 7
+DRAGON = 8
+ARCHER = 9
+CHECKER = 10
+KING_CHECKER = 11
+
+TYPE_MASK = 15
+BLACK = 16
+
+CHESS_CODES = {'.': EMPTY}
+for _letter, _type in (('p', PAWN), ('h', KNIGHT), ('b', BISHOP), ('r', ROOK), ('q', QUEEN),
+                       ('k', KING), ('w', WIZARD), ('d', DRAGON), ('a', ARCHER)):
+    CHESS_CODES[_letter.upper()] = _type
+    CHESS_CODES[_letter] = _type | BLACK
+
+CHECKERS_CODES = {
+    '.': EMPTY,
+    'W': CHECKER,
+    'b': CHECKER | BLACK,
+    'K': KING_CHECKER,
+    'k': KING_CHECKER | BLACK,
+}
+
+LETTERS = ['.'] * 32
+for _codes in (CHESS_CODES, CHECKERS_CODES):
+    for _letter, _code in _codes.items():
+        LETTERS[_code] = _letter
+
+SQUARE_NAMES = tuple(f"{chr(col + ord('a'))}{8 - row}" for row in range(8) for col in range(8))
+
+SQUARES = {}
+for _sq, _name in enumerate(SQUARE_NAMES):
+    SQUARES[_name] = _sq
+    SQUARES[_name.upper()] = _sq
+
+
+def piece_codes(game_type):
+    """Возвращает таблицу перевода символов фигур в коды для указанной игры.
+
+    Args:
+        game_type (str): Тип игры ('chess' или 'checkers').
+
+    Returns:
+        dict: Отображение символа фигуры в её код.
+    """
+    return CHECKERS_CODES if game_type == 'checkers' else CHESS_CODES
+
+
+def square(pos):
+    """Преобразует позицию в нотации (например, 'e2') в индекс клетки.
+
+    Args:
+        pos (str): Позиция в нотации.
+
+    Returns:
+        int: Индекс клетки от 0 (a8) до 63 (h1).
+
+    Raises:
+        ValueError: Если позиция не является клеткой доски.
+    """
+    try:
+        return SQUARES[pos]
+    except KeyError:
+        raise ValueError(f"Некорректная позиция: {pos!r}") from None
+
+
+def pack_move(frm, to):
+    """Упаковывает ход в целое число: биты 0-5 — откуда, биты 6-11 — куда.
+
+    Args:
+        frm (int): Начальная клетка.
+        to (int): Конечная клетка.
+
+    Returns:
+        int: Упакованный ход.
+    """
+    return frm | to << 6
+
+
+def unpack_move(move):
+    """Распаковывает ход, упакованный функцией pack_move.
+
+    Args:
+        move (int): Упакованный ход.
+
+    Returns:
+        tuple: Начальная и конечная клетки.
+    """
+    return move & 63, move >> 6 & 63
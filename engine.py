@@ -0,0 +1,373 @@
+"""Поиск лучшего хода для шахмат с волшебником, драконом и стрелком.
+
+Negamax с альфа-бета отсечениями, итеративным углублением, таблицей
+транспозиций и упорядочиванием ходов (ход из таблицы, взятия по MVV-LVA,
+ходы-убийцы, история). Внутри дерева ходы выдаются по стадиям
+(staged_moves): тихие ходы не готовятся, если отсечение случилось раньше.
+В корне перебираются только ходы, не оставляющие короля под боем
+(bitboard.generate_legal_moves), а внутри дерева — псевдолегальные: ход,
+после которого берут короля, проигрывает. Если так проигрывают все ходы,
+позиция проверяется по легальным ходам: без шаха это пат (ничья), под
+шахом — мат.
+"""
+
+import time
+from collections import namedtuple
+
+from bitboard import FULL, bit_squares, checks_and_pins, generate_legal_moves, occupancy, side_targets
+from core import BLACK, EMPTY, KING, SQUARE_NAMES, TYPE_MASK, unpack_move
+from evaluation import PIECE_VALUES
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+MATE = 1000000
+MATE_BOUND = MATE - 1000
+INFINITY = MATE + 1
+MAX_PLY = 64
+
+SearchResult = namedtuple('SearchResult', 'move score depth nodes elapsed pv')
+
+
+class SearchTimeout(Exception):
+    """Время на поиск истекло."""
+
+
+def move_names(move):
+    """Переводит упакованный ход в пару клеток в нотации.
+
+    Args:
+        move (int): Упакованный ход.
+
+    Returns:
+        tuple: Начальная и конечная клетки (например, ('e2', 'e4')).
+    """
+    frm, to = unpack_move(move)
+    return SQUARE_NAMES[frm], SQUARE_NAMES[to]
+
+
+class Engine:
+    """Шахматный движок; каждый экземпляр хранит собственные таблицы и не делит их с другими."""
+
+    def __init__(self, tt_mb=16, table=None, stop=None):
+        """Создаёт движок.
+
+        Args:
+            tt_mb (float): Размер таблицы транспозиций в мегабайтах.
+            table (TranspositionTable): Готовая таблица (например, общая для
+                нескольких процессов); если задана, tt_mb не используется.
+            stop: Необязательное событие (multiprocessing.Event), по которому
+                поиск прерывается так же, как по истечении времени.
+        """
+        self.table = table if table is not None else TranspositionTable(tt_mb)
+        self.stop = stop
+        self.nodes = 0
+        self._deadline = None
+        self._killers = [[0, 0] for _ in range(MAX_PLY)]
+        self._history = {}
+
+    def evaluate(self, board):
+        """Статическая оценка позиции с точки зрения стороны, чей ход."""
+        return board.score if board.turn == 'white' else -board.score
+
+    def search(self, board, depth=None, movetime=None, first_depth=1):
+        """Ищет лучший ход для стороны, чей ход на доске.
+
+        Args:
+            board (Board): Шахматная доска; после поиска она возвращается в
+                исходное состояние.
+            depth (int): Максимальная глубина в полуходах.
+            movetime (float): Ограничение времени в секундах.
+            first_depth (int): Глубина первой итерации.
+
+        Returns:
+            SearchResult: Лучший ход (упакованный, 0 если ходов нет), оценка
+            в сантипешках, достигнутая глубина, число узлов, время и главная
+            вариация.
+        """
+        if depth is None:
+            depth = MAX_PLY - 1 if movetime else 4
+        started = time.perf_counter()
+        self._deadline = started + movetime if movetime else None
+        self.nodes = 0
+        self._killers = [[0, 0] for _ in range(MAX_PLY)]
+        self._history.clear()
+        self.table.new_search()
+
+        result = SearchResult(0, 0, 0, 0, 0.0, [])
+        history_length = len(board.move_history)
+        for current in range(min(first_depth, depth), depth + 1):
+            try:
+                score, move = self._root(board, current)
+            except SearchTimeout:
+                while len(board.move_history) > history_length:
+                    board.pop()
+                break
+            elapsed = time.perf_counter() - started
+            result = SearchResult(move, score, current, self.nodes, elapsed, self._principal_variation(board, current))
+            if move == 0 or abs(score) >= MATE_BOUND:
+                break
+        return result
+
+    def best_move(self, board, depth=None, movetime=None):
+        """Возвращает лучший ход в нотации или None, если ходов нет.
+
+        Args:
+            board (Board): Шахматная доска.
+            depth (int): Максимальная глубина в полуходах.
+            movetime (float): Ограничение времени в секундах.
+
+        Returns:
+            tuple: Начальная и конечная клетки хода.
+        """
+        result = self.search(board, depth, movetime)
+        return move_names(result.move) if result.move else None
+
+    def _root(self, board, depth):
+        """Перебирает ходы в корне и возвращает оценку и лучший ход."""
+        moves = generate_legal_moves(board.squares, board.turn)
+        if not moves:
+            return self._no_moves_score(board, 0), 0
+        moves = self._ordered(board, moves, self._hash_move(board), 0)
+        alpha, beta = -INFINITY, INFINITY
+        best_move = 0
+        for move in moves:
+            board.push(move)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, 1)
+            board.pop()
+            if score > alpha or best_move == 0:
+                alpha, best_move = score, move
+        self.table.store(board.hash, depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        """Альфа-бета поиск в формулировке negamax."""
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            self._check_stop()
+
+        own = 0 if board.turn == 'white' else BLACK
+        if (KING | own) not in board.squares:
+            return -MATE + ply
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self._quiesce(board, alpha, beta, ply)
+
+        key = board.hash
+        entry = self.table.probe(key)
+        hash_move = 0
+        if entry is not None:
+            entry_depth, value, flag, hash_move = entry
+            if entry_depth >= depth:
+                value = score_from_table(value, ply)
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value >= beta:
+                    return value
+                if flag == UPPER and value <= alpha:
+                    return value
+
+        alpha_start = alpha
+        best, best_move = -INFINITY, 0
+        squares = board.squares
+        for move in staged_moves(squares, board.turn, hash_move, self._killers[ply], self._history):
+            board.push(move)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.pop()
+            if score > best:
+                best, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if squares[move >> 6 & 63] == EMPTY:
+                            self._remember_quiet(move, depth, ply)
+                        break
+        if best <= -MATE_BOUND and not generate_legal_moves(squares, board.turn):
+            best, best_move = self._no_moves_score(board, ply), 0
+
+        if best <= alpha_start:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(key, depth, score_to_table(best, ply), flag, best_move)
+        return best
+
+    def _no_moves_score(self, board, ply):
+        """Оценка позиции без ходов: мат, если король под шахом, иначе пат (ничья)."""
+        return -MATE + ply if checks_and_pins(board.squares, board.turn)[1] else 0
+
+    def _check_stop(self):
+        """Прерывает поиск, если истекло время или поступил сигнал остановки."""
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+        if self.stop is not None and self.stop.is_set():
+            raise SearchTimeout()
+
+    def _quiesce(self, board, alpha, beta, ply):
+        """Поиск только по взятиям, чтобы не оценивать позицию посреди размена."""
+        self.nodes += 1
+        own = 0 if board.turn == 'white' else BLACK
+        if (KING | own) not in board.squares:
+            return -MATE + ply
+        stand_pat = self.evaluate(board)
+        if stand_pat >= beta or ply >= MAX_PLY - 1:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        for move in staged_moves(board.squares, board.turn, quiet=False):
+            board.push(move)
+            score = -self._quiesce(board, -beta, -alpha, ply + 1)
+            board.pop()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def _hash_move(self, board):
+        """Возвращает ход из таблицы транспозиций для текущей позиции."""
+        entry = self.table.probe(board.hash)
+        return entry[3] if entry is not None else 0
+
+    def _ordered(self, board, moves, hash_move, ply):
+        """Сортирует ходы: ход из таблицы, взятия по MVV-LVA, убийцы, история."""
+        squares = board.squares
+        killers = self._killers[ply]
+        history = self._history
+
+        def priority(move):
+            if move == hash_move:
+                return 1 << 30
+            if squares[move >> 6 & 63] != EMPTY:
+                return (1 << 29) + _mvv_lva(squares, move)
+            if move == killers[0]:
+                return 1 << 28
+            if move == killers[1]:
+                return (1 << 28) - 1
+            return history.get(move, 0)
+
+        moves.sort(key=priority, reverse=True)
+        return moves
+
+    def _remember_quiet(self, move, depth, ply):
+        """Запоминает тихий ход, вызвавший отсечение, как убийцу и в истории."""
+        killers = self._killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self._history[move] = self._history.get(move, 0) + depth * depth
+
+    def _principal_variation(self, board, depth):
+        """Восстанавливает главную вариацию по таблице транспозиций."""
+        pv = []
+        seen = set()
+        for _ in range(depth):
+            if board.hash in seen:
+                break
+            seen.add(board.hash)
+            move = self._hash_move(board)
+            if not move or move not in generate_legal_moves(board.squares, board.turn):
+                break
+            pv.append(move_names(move))
+            board.push(move)
+        for _ in pv:
+            board.pop()
+        return pv
+
+
+def staged_moves(squares, color, hash_move=0, killers=(), history=None, quiet=True):
+    """Выдаёт ходы стороны по стадиям, не строя заранее весь упорядоченный список.
+
+    Сначала ход из таблицы транспозиций (если он возможен в позиции), затем
+    взятия по MVV-LVA, включая выстрел стрелка, затем ходы-убийцы и
+    остальные тихие ходы по убыванию истории. Для взятий строятся только
+    атаки на фигуры соперника; тихие ходы генерируются и сортируются, только
+    если перебор дошёл до них, поэтому при отсечении на ходе из таблицы или
+    взятии эта работа не выполняется.
+
+    Доску между выдачей ходов можно менять, если к следующему ходу она
+    возвращена в исходное состояние.
+
+    Args:
+        squares (bytearray): Коды фигур на 64 клетках (Board.squares).
+        color (str): 'white' или 'black'.
+        hash_move (int): Ход из таблицы транспозиций или 0.
+        killers (list): Ходы-убийцы этого уровня.
+        history (dict): Счётчики истории тихих ходов.
+        quiet (bool): Выдавать ли тихие ходы (False — только взятия).
+
+    Yields:
+        int: Ход, упакованный как в core.pack_move.
+    """
+    if hash_move:
+        frm, to = hash_move & 63, hash_move >> 6 & 63
+        for _, targets in side_targets(squares, color, 1 << frm):
+            if targets >> to & 1 and (quiet or squares[to] != EMPTY):
+                yield hash_move
+
+    white, black = occupancy(squares)
+    enemy = black if color == 'white' else white
+    captures = [frm | to << 6 for frm, targets in side_targets(squares, color, within=enemy)
+                for to in bit_squares(targets)]
+    captures.sort(key=lambda move: _mvv_lva(squares, move), reverse=True)
+    for move in captures:
+        if move != hash_move:
+            yield move
+    if not quiet:
+        return
+
+    empty = ~(white | black) & FULL
+    quiets = [frm | to << 6 for frm, targets in side_targets(squares, color, within=empty)
+              for to in bit_squares(targets)]
+    seen = {hash_move}
+    for move in killers:
+        if move and move not in seen and move in quiets:
+            seen.add(move)
+            yield move
+    if history:
+        quiets.sort(key=lambda move: history.get(move, 0), reverse=True)
+    for move in quiets:
+        if move not in seen:
+            yield move
+
+
+def _mvv_lva(squares, move):
+    """Приоритет взятия: ценная жертва важнее, дешёвый нападающий лучше."""
+    victim = PIECE_VALUES.get(squares[move >> 6 & 63] & TYPE_MASK, 0)
+    attacker = PIECE_VALUES.get(squares[move & 63] & TYPE_MASK, 0)
+    return victim * 16 - attacker // 100
+
+
+def score_to_table(score, ply):
+    """Переводит оценку мата в форму, не зависящую от расстояния до корня."""
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """Обратное преобразование к score_to_table."""
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def format_score(score):
+    """Форматирует оценку для вывода пользователю.
+
+    Args:
+        score (int): Оценка в сантипешках.
+
+    Returns:
+        str: Оценка в пешках или число ходов до взятия короля.
+    """
+    if score >= MATE_BOUND:
+        return f"мат в {(MATE - score + 1) // 2}"
+    if score <= -MATE_BOUND:
+        return f"мат через {(MATE + score) // 2}"
+    return f"{score / 100:+.2f}"
+
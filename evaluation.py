@@ -0,0 +1,204 @@
+"""Статическая оценка позиции: материал и таблицы «фигура — клетка».
+
+Оценка считается с точки зрения белых в сантипешках. Доска поддерживает её
+инкрементально в Board._put, поэтому поиску не нужно сканировать все клетки
+в каждом узле; функция evaluate() считает ту же величину с нуля.
+"""
+
+import time
+
+from core import ARCHER, BISHOP, BLACK, CHECKER, DRAGON, KING, KING_CHECKER, KNIGHT, PAWN, QUEEN, ROOK, WIZARD
+
+PIECE_VALUES = {
+    PAWN: 100,
+    KNIGHT: 320,
+    BISHOP: 330,
+    ROOK: 500,
+    QUEEN: 900,
+    KING: 20000,
+    WIZARD: 450,
+    DRAGON: 850,
+    ARCHER: 400,
+    CHECKER: 100,
+    KING_CHECKER: 300,
+}
+
+# Таблицы заданы для белых: первая строка — восьмая горизонталь, как в Board.squares.
+_PAWN_TABLE = (
+    0, 0, 0, 0, 0, 0, 0, 0,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    10, 10, 20, 30, 30, 20, 10, 10,
+    5, 5, 10, 25, 25, 10, 5, 5,
+    0, 0, 0, 20, 20, 0, 0, 0,
+    5, -5, -10, 0, 0, -10, -5, 5,
+    5, 10, 10, -20, -20, 10, 10, 5,
+    0, 0, 0, 0, 0, 0, 0, 0,
+)
+_KNIGHT_TABLE = (
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20, 0, 0, 0, 0, -20, -40,
+    -30, 0, 10, 15, 15, 10, 0, -30,
+    -30, 5, 15, 20, 20, 15, 5, -30,
+    -30, 0, 15, 20, 20, 15, 0, -30,
+    -30, 5, 10, 15, 15, 10, 5, -30,
+    -40, -20, 0, 5, 5, 0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+)
+_BISHOP_TABLE = (
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 10, 10, 5, 0, -10,
+    -10, 5, 5, 10, 10, 5, 5, -10,
+    -10, 0, 10, 10, 10, 10, 0, -10,
+    -10, 10, 10, 10, 10, 10, 10, -10,
+    -10, 5, 0, 0, 0, 0, 5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+)
+_ROOK_TABLE = (
+    0, 0, 0, 0, 0, 0, 0, 0,
+    5, 10, 10, 10, 10, 10, 10, 5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    0, 0, 0, 5, 5, 0, 0, 0,
+)
+_QUEEN_TABLE = (
+    -20, -10, -10, -5, -5, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 5, 5, 5, 0, -10,
+    -5, 0, 5, 5, 5, 5, 0, -5,
+    0, 0, 5, 5, 5, 5, 0, -5,
+    -10, 5, 5, 5, 5, 5, 0, -10,
+    -10, 0, 5, 0, 0, 0, 0, -10,
+    -20, -10, -10, -5, -5, -10, -10, -20,
+)
+_KING_TABLE = (
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+    20, 20, 0, 0, 0, 0, 20, 20,
+    20, 30, 10, 0, 0, 10, 30, 20,
+)
+
+# Волшебник ходит как конь и король, дракон — как ладья и конь: обоим важен центр.
+# Стрелок стреляет по диагоналям, как слон.
+PIECE_SQUARE_TABLES = {
+    PAWN: _PAWN_TABLE,
+    KNIGHT: _KNIGHT_TABLE,
+    BISHOP: _BISHOP_TABLE,
+    ROOK: _ROOK_TABLE,
+    QUEEN: _QUEEN_TABLE,
+    KING: _KING_TABLE,
+    WIZARD: _KNIGHT_TABLE,
+    DRAGON: tuple((r + n) // 2 for r, n in zip(_ROOK_TABLE, _KNIGHT_TABLE)),
+    ARCHER: _BISHOP_TABLE,
+}
+
+
+def _square_scores():
+    """Строит таблицу вклада каждого кода фигуры на каждой клетке.
+
+    Returns:
+        tuple: 32 кортежа по 64 числа; вклад чёрных фигур отрицателен, а их
+        таблица отражена по вертикали.
+    """
+    scores = [(0,) * 64 for _ in range(32)]
+    for kind, value in PIECE_VALUES.items():
+        table = PIECE_SQUARE_TABLES.get(kind, (0,) * 64)
+        scores[kind] = tuple(value + table[sq] for sq in range(64))
+        scores[kind | BLACK] = tuple(-value - table[sq ^ 56] for sq in range(64))
+    return tuple(scores)
+
+
+SQUARE_SCORES = _square_scores()
+
+
+def evaluate(squares):
+    """Вычисляет оценку позиции с нуля.
+
+    Args:
+        squares (bytearray): Коды фигур на 64 клетках.
+
+    Returns:
+        int: Оценка с точки зрения белых в сантипешках.
+    """
+    return sum(SQUARE_SCORES[code][sq] for sq, code in enumerate(squares) if code)
+
+
+def benchmark(board, depth, color):
+    """Сравнивает полную и инкрементальную оценку при обходе дерева ходов.
+
+    Дерево заданной глубины обходится дважды: в первый раз каждая позиция
+    оценивается функцией evaluate(), во второй — чтением Board.score. Время
+    обхода включает ходы и их отмену, то есть то, что реально платит поиск.
+
+    Args:
+        board (Board): Доска; после обхода возвращается в исходное состояние.
+        depth (int): Глубина обхода в полуходах.
+        color (str): Сторона, делающая первый ход.
+
+    Returns:
+        tuple: Число оценённых позиций, время обхода с полной оценкой и время
+        обхода с инкрементальной оценкой в секундах.
+
+    Raises:
+        RuntimeError: Если инкрементальная оценка разошлась с полной.
+    """
+    full_time, full = _timed_walk(board, depth, color, lambda: evaluate(board.squares))
+    incremental_time, incremental = _timed_walk(board, depth, color, lambda: board.score)
+    if full != incremental:
+        raise RuntimeError("инкрементальная оценка разошлась с полной")
+    return len(full), full_time, incremental_time
+
+
+def _timed_walk(board, depth, color, score):
+    """Обходит дерево ходов, вызывая score() в каждом узле.
+
+    Returns:
+        tuple: Затраченное время в секундах и список полученных оценок.
+    """
+    scores = []
+
+    def walk(depth, color):
+        scores.append(score())
+        if depth == 0:
+            return
+        other = 'black' if color == 'white' else 'white'
+        for move in board.generate_moves(color).tolist():
+            board.push(move)
+            walk(depth - 1, other)
+            board.pop()
+
+    started = time.perf_counter()
+    walk(depth, color)
+    return time.perf_counter() - started, scores
+
+
+def run(args):
+    """Выполняет команду evalbench из командной строки.
+
+    Args:
+        args (argparse.Namespace): Аргументы depth, variant, fen и game.
+
+    Returns:
+        int: Код завершения (1, если позицию не удалось получить).
+    """
+    from perft import start_position
+
+    try:
+        board, color = start_position(args)
+    except ValueError as error:
+        print(f"Не удалось получить позицию: {error}")
+        return 1
+    positions, full_time, incremental_time = benchmark(board, args.depth, color)
+    for name, elapsed in (('полная', full_time), ('инкрементальная', incremental_time)):
+        rate = f"{positions / elapsed:,.0f} поз/с" if elapsed > 0 else "-"
+        print(f"{name:<16} {positions} позиций за {elapsed:.3f} с, {rate}")
+    if incremental_time > 0:
+        print(f"Ускорение: {full_time / incremental_time:.2f}x")
+    return 0
@@ -0,0 +1,137 @@
+"""Ходы, упакованные в одно 32-битное число, и история ходов на их основе.
+
+Раскладка битов::
+
+    0-5    начальная клетка
+    6-11   конечная клетка
+    12-16  код сходившей фигуры
+    17-21  код взятой фигуры (EMPTY, если взятия не было)
+    22     JUMP — шашка взята прыжком и стояла перед конечной клеткой
+    23     PROMOTION — шашка стала дамкой
+    24     CONTINUES — серия взятий продолжается, ход остался за той же стороной
+    25-30  клетка, на которой стояла взятая фигура (для хода без прыжка —
+           конечная клетка)
+
+Младшие 12 бит совпадают с core.pack_move. Генератор ходов пишет такие
+12-битные ходы в переиспользуемый буфер MoveBuffer.
+"""
+
+from array import array
+from itertools import islice
+
+from core import LETTERS, SQUARE_NAMES
+
+JUMP = 1 << 22
+PROMOTION = 1 << 23
+CONTINUES = 1 << 24
+CAPTURED_SQUARE_SHIFT = 25
+
+
+def encode_move(frm, to, piece, captured, flags=0, captured_sq=None):
+    """Упаковывает ход в число.
+
+    Args:
+        frm (int): Начальная клетка.
+        to (int): Конечная клетка.
+        piece (int): Код сходившей фигуры.
+        captured (int): Код взятой фигуры или EMPTY.
+        flags (int): Сочетание JUMP, PROMOTION и CONTINUES.
+        captured_sq (int): Клетка взятой фигуры (по умолчанию — конечная).
+
+    Returns:
+        int: Упакованный ход.
+    """
+    if captured_sq is None:
+        captured_sq = to
+    return frm | to << 6 | piece << 12 | captured << 17 | flags | captured_sq << CAPTURED_SQUARE_SHIFT
+
+
+def move_to(move):
+    """Конечная клетка упакованного хода."""
+    return move >> 6 & 63
+
+
+def decode_move(move):
+    """Переводит упакованный ход в запись прежнего строкового формата.
+
+    Args:
+        move (int): Упакованный ход.
+
+    Returns:
+        tuple: (начальная клетка, конечная клетка, символ фигуры, символ
+        взятой фигуры или '.'), например ('e2', 'e4', 'P', '.').
+    """
+    return (SQUARE_NAMES[move & 63], SQUARE_NAMES[move >> 6 & 63],
+            LETTERS[move >> 12 & 31], LETTERS[move >> 17 & 31])
+
+
+class MoveHistory(array):
+    """История ходов: массив array('I') упакованных ходов, по 4 байта на ход."""
+
+    def __new__(cls, moves=()):
+        return super().__new__(cls, 'I', moves)
+
+    def clear(self):
+        """Удаляет все ходы."""
+        del self[:]
+
+    @property
+    def notation(self):
+        """Представление истории в виде строковых записей (см. decode_move)."""
+        return NotationView(self)
+
+
+class NotationView:
+    """Представление истории ходов, декодирующее записи при обращении."""
+
+    def __init__(self, history):
+        self._history = history
+
+    def __len__(self):
+        return len(self._history)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [decode_move(move) for move in self._history[index]]
+        return decode_move(self._history[index])
+
+    def __iter__(self):
+        return map(decode_move, self._history)
+
+
+MAX_MOVES = 256
+
+
+class MoveBuffer:
+    """Заранее выделенный массив ходов, упакованных как в core.pack_move.
+
+    Генерация ходов перезаписывает буфер с начала, поэтому один буфер
+    переиспользуется от позиции к позиции без выделения памяти; при
+    рекурсивном переборе нужен отдельный буфер на каждый уровень.
+    """
+
+    __slots__ = ('moves', 'count')
+
+    def __init__(self, size=MAX_MOVES):
+        """Выделяет буфер.
+
+        Args:
+            size (int): Начальная ёмкость; при нехватке буфер растёт.
+        """
+        self.moves = array('H', bytes(2 * size))
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not -self.count <= index < self.count:
+            raise IndexError("индекс хода вне буфера")
+        return self.moves[index % self.count]
+
+    def __iter__(self):
+        return islice(self.moves, self.count)
+
+    def tolist(self):
+        """Возвращает ходы списком."""
+        return self.moves[:self.count].tolist()
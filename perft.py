@@ -0,0 +1,243 @@
+"""Perft: подсчёт листьев дерева ходов для проверки и замера генератора ходов.
+
+По умолчанию ходы считаются псевдолегальными, как в Board.generate_moves:
+правила шаха не учитываются. С legal=True (ключ --legal) шахматные ходы берутся
+из bitboard.generate_legal_moves — так же, как их разрешает Game.is_valid_move.
+В шашках ходом считается вся серия взятий из checkers.generate_moves с
+обязательным взятием.
+"""
+
+import time
+
+import checkers
+from archive import iter_games, replay
+from bitboard import generate_legal_moves
+from chesss import Board
+from moves import MoveBuffer
+from transposition import EXACT, TranspositionTable
+from zobrist import BLACK_TO_MOVE
+
+REFERENCE_POSITIONS = [
+    ('start', 'chess', [], {1: 20, 2: 400, 3: 9462, 4: 223506}),
+    ('e4 d5', 'chess', [('e2', 'e4'), ('d7', 'd5')], {1: 31, 2: 893, 3: 29332}),
+    ('open archers', 'chess', [('d2', 'd4'), ('e7', 'e5'), ('e2', 'e3'), ('d7', 'd6')],
+     {1: 35, 2: 1183, 3: 43196}),
+    ('checkers start', 'checkers', [], {1: 7, 2: 49, 3: 302, 4: 1469, 5: 7361}),
+    ('checkers exchange', 'checkers', [('c3', 'd4'), ('f6', 'e5')], {1: 1, 2: 2, 3: 14, 4: 99, 5: 621}),
+]
+
+# Позиции (в формате Board.to_fen) для проверки генератора ходов без шаха своему королю.
+LEGAL_REFERENCE_POSITIONS = [
+    ('legal start', 'rwaqkawr/pppppppp/8/8/8/8/PPPPPPPP/RWAQKAWR w', {1: 20, 2: 400, 3: 9462, 4: 223045}),
+    ('archer pin', 'r3k3/8/8/8/1a6/8/3P4/4K3 w', {1: 4, 2: 92, 3: 686, 4: 16439}),
+    ('dragon pin', '4k3/4r3/8/8/8/8/4D3/4K3 w', {1: 9, 2: 61, 3: 923, 4: 11688}),
+    ('archer shot check', '4k3/8/8/8/8/5a2/6P1/7K w', {1: 3, 2: 35, 3: 190, 4: 2550}),
+    ('double check', '4k3/8/8/8/8/3h4/8/r3K3 w', {1: 2, 2: 54, 3: 244, 4: 5967}),
+]
+
+
+def perft(board, depth, color, table=None, legal=False):
+    """Считает число листьев дерева ходов заданной глубины.
+
+    Args:
+        board (Board): Доска; после подсчёта возвращается в исходное состояние.
+        depth (int): Глубина в полуходах.
+        color (str): Сторона, делающая первый ход.
+        table (TranspositionTable): Необязательная таблица транспозиций для
+            повторного использования счётчиков уже посчитанных позиций.
+        legal (bool): Считать в шахматах только ходы, не оставляющие своего
+            короля под боем.
+
+    Returns:
+        int: Число позиций на глубине depth.
+    """
+    if board.game_type == 'checkers':
+        position = checkers.position_from_board(board)
+        start = None
+        if color == board.turn:
+            start = checkers.continuation_square(board)
+        else:
+            position = position[:3] + (position[3] ^ BLACK_TO_MOVE,)
+        return _checkers_perft(position, depth, color, table, start)
+    return _perft(board, depth, color, table, [MoveBuffer() for _ in range(depth)], legal)
+
+
+def _checkers_perft(position, depth, color, table, start=None):
+    """Рекурсия perft для шашек на компактной позиции (см. checkers)."""
+    if depth == 0:
+        return 1
+    key = position[3]
+    if table is not None and depth > 1 and start is None:
+        entry = table.probe(key)
+        if entry is not None and entry[0] == depth:
+            return entry[1]
+    moves = checkers.generate_moves(position, color, start)
+    if depth == 1:
+        return len(moves)
+    other = 'black' if color == 'white' else 'white'
+    nodes = 0
+    for move in moves:
+        nodes += _checkers_perft(checkers.make_move(position, move, color), depth - 1, other, table)
+    if table is not None and start is None:
+        table.store(key, depth, nodes, EXACT)
+    return nodes
+
+
+def _perft(board, depth, color, table, buffers, legal):
+    """Рекурсия perft; buffers[depth - 1] — буфер ходов уровня depth."""
+    if depth == 0:
+        return 1
+    if table is not None and depth > 1:
+        key = board.hash if color == board.turn else board.hash ^ BLACK_TO_MOVE
+        entry = table.probe(key)
+        if entry is not None and entry[0] == depth:
+            return entry[1]
+    if legal and board.game_type == 'chess':
+        moves = generate_legal_moves(board.squares, color)
+    else:
+        moves = board.generate_moves(color, buffers[depth - 1])
+    if depth == 1:
+        return len(moves)
+    other = 'black' if color == 'white' else 'white'
+    nodes = 0
+    for move in moves:
+        board.push(move)
+        nodes += _perft(board, depth - 1, other, table, buffers, legal)
+        board.pop()
+    if table is not None:
+        table.store(key, depth, nodes, EXACT)
+    return nodes
+
+
+def position_from_moves(variant, moves):
+    """Создаёт доску, разыгрывая ходы от начальной позиции.
+
+    Args:
+        variant (str): 'chess' или 'checkers'.
+        moves (list): Пары (start, end) в нотации.
+
+    Returns:
+        tuple: Доска и сторона, чей ход.
+    """
+    board = Board(game_type=variant)
+    for start, end in moves:
+        board.make_move(start, end)
+    return board, board.turn
+
+
+def start_position(args):
+    """Создаёт доску для команд perft и evalbench по аргументам fen или game.
+
+    Args:
+        args (argparse.Namespace): Аргументы variant, fen и game.
+
+    Returns:
+        tuple: Доска и сторона, чей ход.
+
+    Raises:
+        ValueError: Если позиция в fen некорректна или в партии есть
+            недопустимый ход.
+    """
+    if args.fen:
+        board = Board.from_fen(args.fen, args.variant)
+    elif args.game:
+        board = game_position(args.game, args.variant)
+    else:
+        board = Board(game_type=args.variant)
+    return board, board.turn
+
+
+def game_position(filename, variant='chess'):
+    """Проигрывает первую партию файла save или архива (см. archive).
+
+    Args:
+        filename (str): Имя файла партии.
+        variant (str): Вариант для партии без строки-разделителя.
+
+    Returns:
+        Board: Доска после последнего хода партии.
+
+    Raises:
+        ValueError: Если в партии есть недопустимый ход.
+    """
+    game = next(iter_games(filename, variant), None)
+    board = Board(game_type=game.variant if game else variant)
+    if game is not None:
+        for board in replay(game):
+            pass
+    return board
+
+
+def timed_perft(board, depth, color, table=None, legal=False):
+    """Запускает perft и замеряет время.
+
+    Returns:
+        tuple: Число листьев и затраченное время в секундах.
+    """
+    started = time.perf_counter()
+    nodes = perft(board, depth, color, table, legal)
+    return nodes, time.perf_counter() - started
+
+
+def check_reference(max_depth):
+    """Сверяет perft эталонных позиций с известными значениями.
+
+    Args:
+        max_depth (int): Максимальная проверяемая глубина.
+
+    Returns:
+        list: Кортежи (имя, глубина, ожидаемое, полученное, секунды).
+    """
+    results = []
+    for name, variant, moves, expected in REFERENCE_POSITIONS:
+        for depth, count in sorted(expected.items()):
+            if depth > max_depth:
+                continue
+            board, color = position_from_moves(variant, moves)
+            nodes, elapsed = timed_perft(board, depth, color)
+            results.append((name, depth, count, nodes, elapsed))
+    for name, fen, expected in LEGAL_REFERENCE_POSITIONS:
+        for depth, count in sorted(expected.items()):
+            if depth > max_depth:
+                continue
+            board = Board.from_fen(fen)
+            nodes, elapsed = timed_perft(board, depth, board.turn, legal=True)
+            results.append((name, depth, count, nodes, elapsed))
+    return results
+
+
+def _rate(nodes, elapsed):
+    """Форматирует скорость в узлах в секунду."""
+    return f"{nodes / elapsed:,.0f} узл/с" if elapsed > 0 else "-"
+
+
+def run(args):
+    """Выполняет команду perft из командной строки.
+
+    Args:
+        args (argparse.Namespace): Аргументы depth, variant, fen, game, check, legal и tt.
+
+    Returns:
+        int: Код завершения (1, если эталонные значения не совпали или
+        позицию не удалось получить).
+    """
+    if args.check:
+        failed = 0
+        for name, depth, expected, nodes, elapsed in check_reference(args.depth):
+            status = 'ok' if nodes == expected else f'ОШИБКА (ожидалось {expected})'
+            print(f"{name:<20} глубина {depth}: {nodes:>10} {status}  {elapsed:.3f} с, {_rate(nodes, elapsed)}")
+            failed += nodes != expected
+        return 1 if failed else 0
+
+    try:
+        board, color = start_position(args)
+    except ValueError as error:
+        print(f"Не удалось получить позицию: {error}")
+        return 1
+    table = TranspositionTable(args.tt) if args.tt else None
+    for depth in range(1, args.depth + 1):
+        nodes, elapsed = timed_perft(board, depth, color, table, args.legal)
+        print(f"perft({depth}) = {nodes}  {elapsed:.3f} с, {_rate(nodes, elapsed)}")
+    if table is not None:
+        print(f"Таблица транспозиций: {table.size_bytes // 1024} КБ, попаданий {table.hits}, промахов {table.misses}")
+    return 0
@@ -0,0 +1,58 @@
+"""Кэш ответов на запросы к позиции (ходы фигуры, угрозы клетке).
+
+Ключ содержит хеш позиции (zobrist), поэтому после хода, отмены или повтора
+хода старые записи просто перестают совпадать, а при возврате в уже
+встречавшуюся позицию снова используются. Место освобождается по принципу
+LRU: при переполнении удаляется запись, к которой дольше всего не обращались.
+"""
+
+from collections import OrderedDict
+
+CACHE_SIZE = 4096
+
+
+class PositionCache:
+    """LRU-кэш фиксированного размера со счётчиками попаданий и промахов."""
+
+    def __init__(self, size=CACHE_SIZE):
+        """Создаёт пустой кэш.
+
+        Args:
+            size (int): Наибольшее число записей; 0 отключает кэш.
+        """
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key, compute):
+        """Возвращает значение для ключа, вычисляя и запоминая его при промахе.
+
+        Args:
+            key (tuple): Ключ, включающий хеш позиции.
+            compute (callable): Функция без аргументов, вычисляющая значение.
+
+        Returns:
+            Значение из кэша или результат compute().
+        """
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+            self.hits += 1
+            return entries[key]
+        self.misses += 1
+        value = compute()
+        if self.size > 0:
+            entries[key] = value
+            if len(entries) > self.size:
+                entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Удаляет все записи и обнуляет счётчики."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
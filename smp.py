@@ -0,0 +1,111 @@
+"""Параллельный поиск (Lazy SMP) на нескольких процессах.
+
+Все процессы ищут из одной и той же позиции и делятся только таблицей
+транспозиций, лежащей в multiprocessing.shared_memory: находки одного
+процесса сразу сокращают перебор остальным. Записи таблицы пишутся без
+блокировок; запись, испорченная одновременной записью другого процесса, не
+проходит проверку ключа в TranspositionTable.probe и не используется.
+Главный процесс ведёт обычный поиск, а по его окончании останавливает
+помощников; побеждает результат наибольшей завершённой глубины.
+"""
+
+import multiprocessing
+import os
+import queue
+from multiprocessing import shared_memory
+
+from engine import Engine, SearchResult
+from transposition import TranspositionTable
+
+
+def default_workers():
+    """Возвращает число рабочих процессов по умолчанию — по числу ядер."""
+    return os.cpu_count() or 1
+
+
+def parallel_search(board, depth=None, movetime=None, workers=None, tt_mb=64):
+    """Ищет лучший ход несколькими процессами с общей таблицей транспозиций.
+
+    При workers <= 1 поиск идёт в текущем процессе обычным Engine и полностью
+    детерминирован.
+
+    Args:
+        board (Board): Шахматная доска; после поиска возвращается в исходное
+            состояние.
+        depth (int): Максимальная глубина в полуходах.
+        movetime (float): Ограничение времени в секундах.
+        workers (int): Число процессов, включая текущий (по умолчанию — по
+            числу ядер).
+        tt_mb (float): Размер общей таблицы транспозиций в мегабайтах.
+
+    Returns:
+        SearchResult: Результат как у Engine.search; nodes — сумма узлов всех
+        процессов.
+    """
+    if workers is None:
+        workers = default_workers()
+    if workers <= 1:
+        return Engine(tt_mb).search(board, depth, movetime)
+
+    memory = shared_memory.SharedMemory(create=True, size=TranspositionTable.buffer_size(tt_mb))
+    context = multiprocessing.get_context()
+    stop = context.Event()
+    results = context.Queue()
+    helpers = [
+        context.Process(target=_helper, args=(memory.name, tt_mb, board, depth, movetime, index, stop, results),
+                        daemon=True)
+        for index in range(1, workers)
+    ]
+    table = TranspositionTable(tt_mb, memory.buf)
+    try:
+        for process in helpers:
+            process.start()
+        best = Engine(table=table, stop=stop).search(board, depth, movetime)
+        stop.set()
+        nodes = best.nodes
+        for _ in helpers:
+            result = _next_result(results, helpers)
+            if result is None:
+                break
+            nodes += result.nodes
+            if result.move and result.depth > best.depth:
+                best = result
+        for process in helpers:
+            process.join()
+    finally:
+        stop.set()
+        for process in helpers:
+            if process.is_alive():
+                process.terminate()
+        table.release()
+        memory.close()
+        memory.unlink()
+    return best._replace(nodes=nodes)
+
+
+def _next_result(results, helpers):
+    """Ждёт результат помощника; возвращает None, если все помощники завершились без него."""
+    while True:
+        try:
+            return results.get(timeout=0.1)
+        except queue.Empty:
+            if not any(process.is_alive() for process in helpers) and results.empty():
+                return None
+
+
+def _helper(name, tt_mb, board, depth, movetime, index, stop, results):
+    """Поиск в процессе-помощнике; результат отправляется в очередь results.
+
+    Нечётные помощники пропускают первую итерацию углубления, чтобы процессы
+    расходились по дереву, а не повторяли друг друга.
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    table = TranspositionTable(tt_mb, memory.buf)
+    try:
+        result = Engine(table=table, stop=stop).search(board, depth, movetime, first_depth=1 + index % 2)
+    except Exception:
+        result = SearchResult(0, 0, 0, 0, 0.0, [])
+    finally:
+        table.release()
+        memory.close()
+    results.put(result)
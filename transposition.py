@@ -0,0 +1,147 @@
+"""Таблица транспозиций фиксированного размера.
+
+Таблица занимает один заранее выделенный буфер и не растёт во время работы;
+буфер может быть общим для нескольких процессов.
+Записи сгруппированы в корзины по две: первая ячейка хранит самую глубокую
+запись (с учётом поколения поиска), вторая перезаписывается всегда.
+
+Вместо ключа хранится ключ, сложенный по XOR с остальными полями записи.
+Поля пишутся по одному и без блокировок, поэтому другой процесс может
+прочитать новый ключ вместе со старыми данными; такая запись не проходит
+проверку в probe и считается отсутствующей.
+"""
+
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+ENTRY_SIZE = 8 + 8 + 4 + 2
+MAX_DEPTH = 255
+GENERATIONS = 64
+VALUE_MASK = (1 << 64) - 1
+
+
+class TranspositionTable:
+    """Таблица транспозиций с ограниченной памятью и схемой замены «глубина + всегда»."""
+
+    def __init__(self, mb=16, buffer=None):
+        """Выделяет таблицу заданного размера.
+
+        Args:
+            mb (float): Бюджет памяти в мегабайтах. Число корзин округляется
+                вниз до степени двойки.
+            buffer: Необязательный внешний буфер не меньше buffer_size(mb)
+                байт, например multiprocessing.shared_memory.SharedMemory.buf;
+                так несколько процессов работают с одной таблицей.
+        """
+        buckets = self.bucket_count(mb)
+        self.buckets = buckets
+        self._mask = buckets - 1
+        if buffer is None:
+            buffer = bytearray(self.buffer_size(mb))
+        self._buffer = memoryview(buffer)[:2 * buckets * ENTRY_SIZE]
+        n = 2 * buckets
+        self._keys = self._buffer[:8 * n].cast('Q')
+        self._values = self._buffer[8 * n:16 * n].cast('q')
+        self._moves = self._buffer[16 * n:20 * n].cast('I')
+        self._meta = self._buffer[20 * n:].cast('H')
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def bucket_count(mb):
+        """Возвращает число корзин для бюджета памяти.
+
+        Args:
+            mb (float): Бюджет памяти в мегабайтах.
+
+        Returns:
+            int: Степень двойки.
+        """
+        entries = max(2, int(mb * 1024 * 1024) // ENTRY_SIZE)
+        return 1 << (entries // 2).bit_length() - 1
+
+    @classmethod
+    def buffer_size(cls, mb):
+        """Возвращает размер буфера в байтах для бюджета памяти.
+
+        Args:
+            mb (float): Бюджет памяти в мегабайтах.
+
+        Returns:
+            int: Число байт.
+        """
+        return 2 * cls.bucket_count(mb) * ENTRY_SIZE
+
+    @property
+    def size_bytes(self):
+        """Размер выделенных массивов в байтах."""
+        return 2 * self.buckets * ENTRY_SIZE
+
+    def clear(self):
+        """Очищает таблицу, не освобождая память."""
+        self._buffer[:] = bytes(len(self._buffer))
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def release(self):
+        """Отпускает представления буфера, чтобы внешний буфер можно было закрыть."""
+        for view in (self._keys, self._values, self._moves, self._meta, self._buffer):
+            view.release()
+
+    def new_search(self):
+        """Начинает новое поколение: записи прошлых поисков вытесняются первыми."""
+        self.generation = (self.generation + 1) % GENERATIONS
+
+    def probe(self, key):
+        """Ищет запись позиции.
+
+        Args:
+            key (int): 64-битный хеш позиции.
+
+        Returns:
+            tuple: (глубина, значение, тип оценки, ход) или None, если записи нет.
+        """
+        first = (key & self._mask) << 1
+        keys, values, moves, meta = self._keys, self._values, self._moves, self._meta
+        for slot in (first, first + 1):
+            info = meta[slot]
+            if info:
+                value, move = values[slot], moves[slot]
+                if keys[slot] == key ^ _check(value, move, info):
+                    self.hits += 1
+                    return (info >> 2) & MAX_DEPTH, value, info & 3, move
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value, flag, move=0):
+        """Сохраняет запись позиции.
+
+        Запись попадает в первую ячейку корзины, если та пуста, принадлежит
+        той же позиции, осталась от прошлого поиска или не глубже новой;
+        иначе — во вторую ячейку, которая перезаписывается всегда.
+
+        Args:
+            key (int): 64-битный хеш позиции.
+            depth (int): Глубина, на которой получено значение (0..255).
+            value (int): Оценка или число узлов.
+            flag (int): EXACT, LOWER или UPPER.
+            move (int): Лучший ход в упакованном виде.
+        """
+        slot = (key & self._mask) << 1
+        info = self._meta[slot]
+        if (info and self._keys[slot] != key ^ _check(self._values[slot], self._moves[slot], info)
+                and info >> 10 == self.generation and (info >> 2) & MAX_DEPTH > depth):
+            slot += 1
+        info = flag | min(depth, MAX_DEPTH) << 2 | self.generation << 10
+        self._keys[slot] = key ^ _check(value, move, info)
+        self._values[slot] = value
+        self._moves[slot] = move
+        self._meta[slot] = info
+
+
+def _check(value, move, info):
+    """Сворачивает поля записи в 64-битное число для проверки ключа."""
+    return value & VALUE_MASK ^ move ^ info << 32
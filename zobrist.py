@@ -0,0 +1,33 @@
+"""Ключи Zobrist для 64-битного хеширования позиций.
+
+Хеш позиции — XOR ключей всех фигур на их клетках и, если ходят чёрные,
+ключа стороны. Ключи порождаются генератором с фиксированным зерном,
+поэтому хеш одной и той же позиции совпадает между запусками и процессами.
+"""
+
+import random
+
+_rng = random.Random(0x5EED_C4E55)
+
+PIECE_KEYS = tuple(
+    tuple(0 for _ in range(64)) if code == 0 else tuple(_rng.getrandbits(64) for _ in range(64))
+    for code in range(32)
+)
+BLACK_TO_MOVE = _rng.getrandbits(64)
+
+
+def position_hash(squares, turn):
+    """Вычисляет хеш позиции с нуля.
+
+    Args:
+        squares (bytearray): Коды фигур на 64 клетках.
+        turn (str): Сторона, чей ход ('white' или 'black').
+
+    Returns:
+        int: 64-битный хеш позиции.
+    """
+    h = BLACK_TO_MOVE if turn == 'black' else 0
+    for sq, code in enumerate(squares):
+        if code:
+            h ^= PIECE_KEYS[code][sq]
+    return h